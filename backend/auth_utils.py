@@ -1,7 +1,19 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+# bcrypt のコスト（2^rounds 回）。既存ハッシュは各自のコストのまま検証できる
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt 専用スレッド数と、待ち行列を含めた同時受付数（超えたら 503）
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", "2"))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 16)))
+
 # bcrypt を使用（推奨）
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 
 def hash_password(password: str) -> str:
@@ -33,3 +45,82 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         # ハッシュ形式が壊れている等でも落とさず False
         return False
+
+
+# =====================
+# 専用ワーカープール（async ハンドラ用）
+# =====================
+
+class PasswordHasherBusy(RuntimeError):
+    """bcrypt の待ち行列が上限に達した"""
+
+
+class PasswordHasher:
+    """
+    bcrypt を専用の ThreadPoolExecutor で実行する。
+    ログイン集中時もデフォルトのスレッドプール（他の sync エンドポイント）を占有しない。
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.pending = 0
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+
+        queued_at = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self.active += 1
+                self.wait_seconds += started - queued_at
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.run_seconds += time.perf_counter() - started
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        done = self.completed
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "queued": max(self.pending - self.active, 0),
+            "active": self.active,
+            "completed": done,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds * 1000 / done, 1) if done else 0.0,
+            "avg_run_ms": round(self.run_seconds * 1000 / done, 1) if done else 0.0,
+        }
+
+
+password_hasher = PasswordHasher(BCRYPT_WORKERS, BCRYPT_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
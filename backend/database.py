@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 import os
+import threading
+import time
 from pathlib import Path
 
 # ✅ Force .env load from the backend folder (same as database.py)
@@ -20,8 +24,71 @@ print(f"  USER={MYSQL_USER}")
 print(f"  HOST={MYSQL_HOST}")
 print(f"  DB={MYSQL_DB}")
 
+# Connection pool (per process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle below MySQL's wait_timeout so idle connections are never reused after the server dropped them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+
 SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{MYSQL_USER}:{MYSQL_PASSWORD}@{MYSQL_HOST}/{MYSQL_DB}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+
+# =====================
+# Pool metrics
+# =====================
+
+class PoolStats:
+    """Checkout wait time and exhaustion counters, shared by every pool the engine creates."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - started, timed_out=True)
+            print(f"⚠️ DB pool exhausted (size={DB_POOL_SIZE}, overflow={DB_MAX_OVERFLOW})")
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **_pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -31,3 +98,18 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def pool_metrics() -> dict:
+    pool = engine.pool
+    checkouts = pool_stats.checkouts
+    return {
+        "size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "checkouts": checkouts,
+        "avg_wait_ms": round(pool_stats.wait_seconds * 1000 / checkouts, 2) if checkouts else 0.0,
+        "max_wait_ms": round(pool_stats.max_wait_seconds * 1000, 2),
+        "exhausted": pool_stats.timeouts,
+    }
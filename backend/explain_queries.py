@@ -0,0 +1,93 @@
+"""
+EXPLAIN + timing for the hot lookup queries (MySQL).
+
+Run it before and after `python -m backend.migrate` to compare plans:
+
+    python -m backend.explain_queries            # plans + avg latency over 50 runs
+    python -m backend.explain_queries --runs 200
+    python -m backend.explain_queries --url sqlite:///copy.db   # any other database
+
+Captured output is kept next to the migration it was taken for
+(migrations/003_hot_lookup_indexes.explain.txt).
+
+Before 003_hot_lookup_indexes.sql the like / comment / notification lookups
+show `type=ALL` (full scan) or an FK index followed by a filter. Afterwards
+they use `ref` or `const` on the new composite indexes.
+"""
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+from .database import engine
+
+QUERIES = {
+    "already_liked": (
+        "SELECT id FROM post_likes WHERE post_id = :post_id AND user_id = :user_id LIMIT 1"
+    ),
+    "likes_of_user": (
+        "SELECT post_id FROM post_likes WHERE user_id = :user_id"
+    ),
+    "comments_of_post": (
+        "SELECT id, comment FROM post_comments WHERE post_id = :post_id ORDER BY created_at"
+    ),
+    "notifications_of_user": (
+        "SELECT id, title FROM notifications WHERE user_id = :user_id ORDER BY created_at DESC LIMIT 50"
+    ),
+    "feed_page": (
+        "SELECT id FROM community_posts ORDER BY created_at DESC, id DESC LIMIT 50"
+    ),
+    "user_by_name": (
+        "SELECT favorite_foods FROM users WHERE name = :name"
+    ),
+}
+
+
+def _sample_params(conn) -> dict:
+    post_id = conn.execute(text("SELECT MAX(id) FROM community_posts")).scalar() or 0
+    user = conn.execute(text("SELECT id, name FROM users ORDER BY id DESC LIMIT 1")).first()
+    return {
+        "post_id": post_id,
+        "user_id": user[0] if user else 0,
+        "name": user[1] if user else "",
+    }
+
+
+def _print_plan(conn, sql: str, params: dict):
+    if conn.dialect.name == "sqlite":
+        for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).mappings():
+            print(f"    {row['detail']}")
+        return
+    for row in conn.execute(text(f"EXPLAIN {sql}"), params).mappings():
+        print(
+            f"    table={row.get('table')} type={row.get('type')} key={row.get('key')} "
+            f"rows={row.get('rows')} extra={row.get('Extra')}"
+        )
+
+
+def main(runs: int = 50, bind=engine):
+    with bind.connect() as conn:
+        params = _sample_params(conn)
+        print(f"Sample parameters: {params}\n")
+
+        for name, sql in QUERIES.items():
+            started = time.perf_counter()
+            for _ in range(runs):
+                conn.execute(text(sql), params).fetchall()
+            avg_ms = (time.perf_counter() - started) * 1000 / runs
+
+            print(f"▶ {name}  avg {avg_ms:.2f} ms")
+            _print_plan(conn, sql, params)
+            print()
+
+
+def _option(args: list[str], name: str) -> str | None:
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    url = _option(args, "--url")
+    main(int(_option(args, "--runs") or 50), create_engine(url) if url else engine)
@@ -18,80 +18,75 @@ print("MYSQL_HOST =", os.getenv("MYSQL_HOST"))
 # ==============================================
 # ✅ Imports
 # ==============================================
-from fastapi import FastAPI, File, UploadFile, Body
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, UploadFile, Body, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-import httpx
 import asyncio
+from sqlalchemy.orm import Session
 
 from . import models
 from . import database
-from .routers import auth, auth_google, posts, community, users
-
-import requests
-from PIL import Image
-from io import BytesIO
+from . import migrate
+from .auth_utils import password_hasher
+from .pagination import NEXT_CURSOR_HEADER
+from .static_files import ImmutableStaticFiles
+from .routers import auth, auth_google, posts, community, users, variants
+from .services import favorites, food_images, google_userinfo, image_variants, recommender, trending
+from .services.food_images import get_food_images
+from .services.prediction_cache import prediction_cache
+from .services.image_pipeline import image_pipeline, preprocess_for_prediction, PipelineSaturated
+from .services.uploads import save_upload_temp, MaxUploadSizeMiddleware
+from .services.batching import BatcherSaturated
+from .services.classifier import classifier, classification_batcher, ClassifierError
+from .services.http_client import http_pool, get_http_client
+from .services.recipe_store import get_recipe, build_recipe_response, find_stored_recipe_id
+from .services.resilience import upstreams, UpstreamUnavailable
+from .services.spoonacular_service import search_recipe_id
+from .services.singleflight import search_flight, recipe_flight, translation_flight
+from .services.translation import (
+    translate_async, translate_batch, translate_batch_checked, translation_memory, batch_stats
+)
 
 
-# ==============================================
-# 🌐 DeepL / OpenAI Translation (Async + Batch)
-# ==============================================
-DEEPL_API_KEY = os.getenv("DEEPL_API_KEY")
-
-async def translate_async(client: httpx.AsyncClient, text: str, target_lang: str = "JA") -> str:
-    """Non-blocking translation of a single string."""
-    if not text:
-        return ""
-
-    # 1️⃣ Try DeepL
-    try:
-        url = "https://api-free.deepl.com/v2/translate"
-        params = {
-            "auth_key": DEEPL_API_KEY,
-            "text": text,
-            "target_lang": target_lang
-        }
-        response = await client.post(url, data=params, timeout=10)
-        data = response.json()
-        if "translations" in data:
-            return data["translations"][0]["text"]
-    except Exception as e:
-        print(f"⚠️ DeepL Async Error: {e}")
-
-    # 2️⃣ No Fallback: Return original if DeepL fails
-    return text
-
-async def translate_batch(client: httpx.AsyncClient, texts: list[str]) -> list[str]:
-    """Translate multiple strings in ONE API call (reduces lag)."""
-    if not texts: return []
-    
-    # Filter empty strings to avoid breaking logic
-    valid_texts = [t for t in texts if t]
-    if not valid_texts: return texts
-    
-    # Delimiter for batching
-    delimiter = "\n|||\n"
-    combined = delimiter.join(valid_texts)
-    
-    # Translate the big block
-    translated_block = await translate_async(client, combined)
-    
-    # Split back
-    parts = translated_block.split(delimiter)
-    
-    # Re-map to original size (simple approach usually works, or precise map)
-    # If standard split fails, fallback to line-splitting or return block
-    # For safety, if counts mismatch, just return originals or best effort.
-    if len(parts) == len(valid_texts):
-        return parts
-        
-    # Fallback if delimiter got messed up: try simple newline split
-    return translated_block.split("\n")[:len(valid_texts)]
-
 # ==============================================
 # 🚀 FastAPI Setup
 # ==============================================
-app = FastAPI(title="🍣 Food AI Backend")
+# Set to 0 when migrations run as a separate deploy step (python -m backend.migrate)
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "1") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema: numbered migrations, then any missing model tables (see backend/migrate.py);
+    # either way the app does not start if a mapped column is missing
+    if DB_MIGRATE_ON_STARTUP:
+        await asyncio.to_thread(migrate.run, database.engine)
+    else:
+        # Migrations are a separate deploy step: refuse to start against an older schema
+        await asyncio.to_thread(migrate.check_schema, database.engine)
+
+    # One pooled upstream client for HuggingFace / Spoonacular / DeepL
+    http_pool.start()
+    await image_pipeline.warmup()
+    await classifier.warmup()
+
+    # Periodic re-aggregation / decay of the trending table
+    trending_task = asyncio.create_task(trending.refresh_loop()) if trending.TRENDING_REFRESH_SECONDS > 0 else None
+    # Periodic recomputation of the recommendations table
+    recommender_task = asyncio.create_task(recommender.refresh_loop()) if recommender.RECOMMENDER_REFRESH_SECONDS > 0 else None
+
+    yield
+
+    if trending_task:
+        trending_task.cancel()
+    if recommender_task:
+        recommender_task.cancel()
+    await classification_batcher.stop()
+    image_pipeline.shutdown()
+    image_variants.variant_pipeline.shutdown()
+    await http_pool.close()
+
+
+app = FastAPI(title="🍣 Food AI Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -99,15 +94,9 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
-
-# API Keys
-HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
-HUGGINGFACE_MODEL = os.getenv("HUGGINGFACE_MODEL")
-SPOONACULAR_API_KEY = os.getenv("SPOONACULAR_API_KEY")
-
-# Load DB tables
-models.Base.metadata.create_all(bind=database.engine)
+app.add_middleware(MaxUploadSizeMiddleware)
 
 # Include routers
 app.include_router(posts.router)
@@ -115,29 +104,10 @@ app.include_router(auth.router)
 app.include_router(auth_google.router)
 app.include_router(community.router)
 app.include_router(users.router)
+app.include_router(variants.router)
 
-# Mount static files for uploaded images
-app.mount("/uploads", StaticFiles(directory="backend/uploads"), name="uploads")
-
-
-# ==============================================
-# ⭐ NEW — Get food image from Spoonacular
-# ==============================================
-def get_food_image(food_name: str):
-    try:
-        search_url = (
-            f"https://api.spoonacular.com/recipes/complexSearch"
-            f"?query={food_name}&number=1&apiKey={SPOONACULAR_API_KEY}"
-        )
-        res = requests.get(search_url, timeout=10).json()
-
-        if res.get("results"):
-            return res["results"][0].get("image")
-
-    except Exception as e:
-        print("❌ Image fetch error:", e)
-
-    return None  # fallback
+# Mount static files for uploaded images (immutable names → long-lived caching, ETag / 304, Range)
+app.mount("/uploads", ImmutableStaticFiles(directory="backend/uploads"), name="uploads")
 
 
 # ==============================================
@@ -146,112 +116,110 @@ def get_food_image(food_name: str):
 @app.post("/predict")
 async def predict_food(file: UploadFile = File(...), lang: str = "en"):
     try:
-        # Resize image
-        image_bytes = await file.read()
-        image = Image.open(BytesIO(image_bytes)).convert("RGB")
-        image.thumbnail((512, 512))
-        buf = BytesIO()
-        image.save(buf, format="JPEG", quality=85)
-        img_final = buf.getvalue()
-
-        async with httpx.AsyncClient() as client:
-            # 1. HuggingFace Prediction (Async)
-            hf_url = f"https://router.huggingface.co/hf-inference/models/{HUGGINGFACE_MODEL}"
-            headers = {
-                "Authorization": f"Bearer {HUGGINGFACE_API_KEY}",
-                "Content-Type": "image/jpeg",
+        # Stream the upload to a temp file, then resize it off the event loop
+        upload_path = await save_upload_temp(file)
+        try:
+            img_final, image_hash = await image_pipeline.run(preprocess_for_prediction, upload_path)
+        finally:
+            os.remove(upload_path)
+
+        # Repeat scans of the same photo are served from the prediction cache
+        # (featureless images have no fingerprint and are never cached)
+        cache_key = prediction_cache.make_key(image_hash, lang) if image_hash else None
+        cached = await prediction_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            print(f"⚡ Prediction cache hit: {cache_key}")
+            return cached
+
+        client = get_http_client()
+
+        # 1. Classify (local ONNX or HuggingFace router, see CLASSIFIER_BACKEND)
+        try:
+            pred = await classification_batcher.submit(img_final)
+        except ClassifierError as e:
+            return {"error": str(e), "recipe_found": False}
+
+        food_name = pred[0]["label"].lower()
+        confidence = pred[0]["score"]
+        print(f"✅ AI Result: {food_name} ({confidence})")
+
+        # 2. Parallel: Translate Name & Search Repository
+        # We run these concurrently to save time.
+        # `degraded` answers (fallback recipe, untranslated text) are returned but never cached.
+        degraded = False
+
+        async def search_spoonacular():
+            nonlocal degraded
+            queries = [food_name, f"{food_name} recipe"]
+            try:
+                for q in queries:
+                    recipe_id = await search_recipe_id(client, q)
+                    if recipe_id:
+                        return recipe_id
+            except UpstreamUnavailable as e:
+                # Fail fast to a recipe we already have instead of waiting on Spoonacular
+                print(f"⚠️ Spoonacular unavailable, using stored recipes: {e}")
+                degraded = True
+                return await find_stored_recipe_id(food_name)
+            return None
+
+        # Execute translation and search in parallel
+        task_trans_name = translate_batch_checked(client, [food_name]) if lang != "en" else asyncio.sleep(0)
+        task_search = search_spoonacular()
+        
+        gathered = await asyncio.gather(task_trans_name, task_search)
+        if lang != "en":
+            (food_name_jp,), name_translated = gathered[0]
+            degraded = degraded or not name_translated
+        else:
+            food_name_jp = food_name
+        recipe_id = gathered[1]
+
+        if not recipe_id:
+            result = {
+                "predicted_food_en": food_name,
+                "predicted_food_jp": food_name_jp,
+                "confidence": confidence,
+                "recipe_found": False,
+                "recipe": None,
             }
+            if cache_key and not degraded:
+                await prediction_cache.set(cache_key, result)
+            return result
 
-            print("🚀 Sending image to HuggingFace (Async)...")
-            res = await client.post(hf_url, headers=headers, content=img_final, timeout=60)
+        # 3. Fetch Recipe (local store first) & Batch Translate (Parallel)
+        stored = await get_recipe(client, recipe_id)
 
-            try:
-                pred = res.json()
-            except:
-                return {"error": "Invalid HuggingFace response", "recipe_found": False}
+        title_en = stored["title"]
+        instructions_en = stored["instructions"] if stored["instructions"] is not None else "No instructions available."
 
-            if not pred or not isinstance(pred, list):
-                return {"error": "No prediction", "recipe_found": False}
+        # Title, instructions and ingredients go to DeepL as one positional batch
+        ing_names = [ing["name"] or "" for ing in stored["ingredients"]]
+        
+        (t_title, t_instr, *t_ingreds), translated = await translate_batch_checked(
+            client, [title_en, instructions_en, *ing_names]
+        )
+        # A failed /information fetch comes back as an empty recipe
+        degraded = degraded or not translated or not stored.get("id")
 
-            food_name = pred[0]["label"].lower()
-            confidence = pred[0]["score"]
-            print(f"✅ AI Result: {food_name} ({confidence})")
+        recipe = build_recipe_response(stored, instructions_en, t_title, t_instr, t_ingreds)
 
-            # 2. Parallel: Translate Name & Search Repository
-            # We run these concurrently to save time
-            async def search_spoonacular():
-                queries = [food_name, f"{food_name} recipe"]
-                for q in queries:
-                    url = "https://api.spoonacular.com/recipes/complexSearch"
-                    params = {"query": q, "number": 1, "apiKey": SPOONACULAR_API_KEY}
-                    r = await client.get(url, params=params, timeout=15)
-                    d = r.json()
-                    if d.get("results"):
-                        return d["results"][0]["id"]
-                return None
-
-            # Execute translation and search in parallel
-            task_trans_name = translate_async(client, food_name) if lang != "en" else asyncio.sleep(0)
-            task_search = search_spoonacular()
-            
-            gathered = await asyncio.gather(task_trans_name, task_search)
-            food_name_jp = gathered[0] if lang != "en" else food_name
-            recipe_id = gathered[1]
-
-            if not recipe_id:
-                return {
-                    "predicted_food_en": food_name,
-                    "predicted_food_jp": food_name_jp,
-                    "confidence": confidence,
-                    "recipe_found": False,
-                    "recipe": None,
-                }
-
-            # 3. Fetch Recipe & Batch Translate (Parallel)
-            info_url = (
-                f"https://api.spoonacular.com/recipes/{recipe_id}/information"
-                f"?apiKey={SPOONACULAR_API_KEY}"
-            )
-            info_res = await client.get(info_url, timeout=20)
-            info = info_res.json()
-
-            title_en = info.get("title", "")
-            instructions_en = info.get("instructions", "No instructions available.")
-            ingredients_raw = info.get("extendedIngredients", [])
-
-            # Batch Translate Ingredients (Huge Performance Win)
-            ing_names = [ing.get("name", "") for ing in ingredients_raw]
-            
-            t_title, t_instr, t_ingreds = await asyncio.gather(
-                translate_async(client, title_en),
-                translate_async(client, instructions_en),
-                translate_batch(client, ing_names)
-            )
-
-            recipe = {
-                "name_en": title_en,
-                "name_jp": t_title,
-                "image": info.get("image"),
-                "instructions_en": instructions_en,
-                "instructions_jp": t_instr,
-                "ingredients_en": [
-                    {
-                        "ingredient": ing.get("name"),
-                        "measure": f"{ing.get('amount', '')} {ing.get('unit', '')}".strip()
-                    }
-                    for ing in ingredients_raw
-                ],
-                "ingredients_jp": t_ingreds, # List of strings
-                "sourceUrl": info.get("sourceUrl"),
-            }
+        result = {
+            "predicted_food_en": food_name,
+            "predicted_food_jp": food_name_jp,
+            "confidence": confidence,
+            "recipe_found": True,
+            "recipe": recipe,
+        }
+        if cache_key and not degraded:
+            await prediction_cache.set(cache_key, result)
+        return result
 
-            return {
-                "predicted_food_en": food_name,
-                "predicted_food_jp": food_name_jp,
-                "confidence": confidence,
-                "recipe_found": True,
-                "recipe": recipe,
-            }
+    except HTTPException:
+        raise
+
+    except (PipelineSaturated, BatcherSaturated):
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
 
     except Exception as e:
         print("❌ Async Predict Error:", e)
@@ -264,78 +232,53 @@ async def predict_food(file: UploadFile = File(...), lang: str = "en"):
 @app.get("/api/recipe/{food_name}")
 async def get_recipe_by_name(food_name: str, lang: str = "ja"):
     try:
-        async with httpx.AsyncClient() as client:
-            recipe_id = None
-            
-            # Helper to search
-            async def search_sq(q):
-                try:
-                    url = "https://api.spoonacular.com/recipes/complexSearch"
-                    params = {"query": q, "number": 1, "apiKey": SPOONACULAR_API_KEY}
-                    r = await client.get(url, params=params, timeout=10)
-                    d = r.json()
-                    if d.get("results"):
-                        return d["results"][0]["id"]
-                except: pass
-                return None
-
-            # 1. Search Spoonacular (Original Name)
-            # Try exact and underscore-replaced
-            queries = [food_name, food_name.replace("_", " ")]
-            
-            for q in queries:
-                recipe_id = await search_sq(q)
-                if recipe_id: break
-            
-            # 2. If not found, try translating to English and search again
-            if not recipe_id:
-                print(f"⚠️ No results for '{food_name}', translating to English...")
-                translated_name = await translate_async(client, food_name, target_lang="EN")
-                print(f"➡️ Translated: {translated_name}")
-                recipe_id = await search_sq(translated_name)
-
-            if not recipe_id:
-                return {"detail": "Not Found", "recipe": None}
-
-            # Fetch complete recipe
-            info_url = (
-                f"https://api.spoonacular.com/recipes/{recipe_id}/information"
-                f"?apiKey={SPOONACULAR_API_KEY}"
-            )
-            info_res = await client.get(info_url, timeout=20)
-            info = info_res.json()
-
-            title_en = info.get("title", "")
-            instructions_en = info.get("instructions", "") or "No instructions."
-            ingredients_raw = info.get("extendedIngredients", [])
-
-            # Parallel Translate
-            ing_names = [ing.get("name", "") for ing in ingredients_raw]
-            
-            t_title, t_instr, t_ingreds = await asyncio.gather(
-                translate_async(client, title_en),
-                translate_async(client, instructions_en),
-                translate_batch(client, ing_names)
-            )
-
-            recipe = {
-                "name_en": title_en,
-                "name_jp": t_title,
-                "image": info.get("image"),
-                "instructions_en": instructions_en,
-                "instructions_jp": t_instr,
-                "ingredients_en": [
-                    {
-                        "ingredient": ing.get("name"),
-                        "measure": f"{ing.get('amount', '')} {ing.get('unit', '')}".strip()
-                    }
-                    for ing in ingredients_raw
-                ],
-                "ingredients_jp": t_ingreds,
-                "sourceUrl": info.get("sourceUrl"),
-            }
+        client = get_http_client()
+
+        recipe_id = None
+        
+        # Helper to search
+        async def search_sq(q):
+            try:
+                return await search_recipe_id(client, q)
+            except UpstreamUnavailable:
+                return await find_stored_recipe_id(q)
+            except: pass
+            return None
+
+        # 1. Search Spoonacular (Original Name)
+        # Try exact and underscore-replaced
+        queries = [food_name, food_name.replace("_", " ")]
+        
+        for q in queries:
+            recipe_id = await search_sq(q)
+            if recipe_id: break
+        
+        # 2. If not found, try translating to English and search again
+        if not recipe_id:
+            print(f"⚠️ No results for '{food_name}', translating to English...")
+            translated_name = await translate_async(client, food_name, target_lang="EN")
+            print(f"➡️ Translated: {translated_name}")
+            recipe_id = await search_sq(translated_name)
+
+        if not recipe_id:
+            return {"detail": "Not Found", "recipe": None}
 
-            return {"recipe": recipe}
+        # Fetch complete recipe (local store first)
+        stored = await get_recipe(client, recipe_id)
+
+        title_en = stored["title"]
+        instructions_en = stored["instructions"] or "No instructions."
+
+        # Title, instructions and ingredients go to DeepL as one positional batch
+        ing_names = [ing["name"] or "" for ing in stored["ingredients"]]
+        
+        t_title, t_instr, *t_ingreds = await translate_batch(
+            client, [title_en, instructions_en, *ing_names]
+        )
+
+        recipe = build_recipe_response(stored, instructions_en, t_title, t_instr, t_ingreds)
+
+        return {"recipe": recipe}
 
     except Exception as e:
         return {"error": str(e), "recipe": None}
@@ -346,61 +289,114 @@ async def get_recipe_by_name(food_name: str, lang: str = "ja"):
 # ⭐ Save user preferences
 # ============================================================
 @app.post("/api/users/{user_id}/preferences")
-def save_preferences(user_id: int, prefs: dict = Body(...)):
+def save_preferences(user_id: int, prefs: dict = Body(...), db: Session = Depends(database.get_db)):
     foods = prefs.get("foods", [])
-    foods_str = ",".join(foods)
 
     try:
-        conn = database.engine.raw_connection()
-        cur = conn.cursor()
-
-        cur.execute(
-            "UPDATE users SET favorite_foods=%s WHERE id=%s",
-            (foods_str, user_id)
-        )
-        conn.commit()
-
-        cur.close()
-        conn.close()
-        return {"status": "ok", "saved": foods}
+        # One row per food in user_favorite_foods (bulk upsert)
+        saved = favorites.save_favorites(db, user_id, foods)
+        return {"status": "ok", "saved": saved}
 
     except Exception as e:
+        db.rollback()
         return {"error": str(e)}
 
 
 # ============================================================
 # ⭐ UPDATED — Get Recommendations with Images
 # ============================================================
-@app.get("/api/recommendations/name/{username}")
-def get_recommendations_by_name(username: str):
+def _load_recommendations(user_id: int) -> tuple[list, list[str]]:
+    """Precomputed rows (single indexed read); favorites only when there are none yet."""
+    db = database.SessionLocal()
     try:
-        conn = database.engine.raw_connection()
-        cur = conn.cursor()
+        rows = [
+            (r.recipe_name, r.image_url, r.reason)
+            for r in recommender.get_recommendations(db, user_id)
+        ]
+        return rows, [] if rows else favorites.get_favorites(db, user_id)
+    finally:
+        db.close()
 
-        cur.execute("SELECT favorite_foods FROM users WHERE name=%s", (username,))
-        row = cur.fetchone()
 
-        cur.close()
-        conn.close()
+async def _recommendation_items(user_id: int | None) -> dict:
+    rows, foods = [], []
+    if user_id:
+        rows, foods = await asyncio.to_thread(_load_recommendations, user_id)
 
+    if rows:
+        items = [{"name": name, "image": image, "reason": reason} for name, image, reason in rows]
+    else:
         # No preferences
-        if not row or not row[0]:
+        if not foods:
             return {"items": []}
+        items = [{"name": f, "image": None} for f in foods]
 
-        foods = row[0].split(",")
+    # ⭐ Fill missing images (cached, looked up concurrently)
+    missing = [item for item in items if not item["image"]]
+    if missing:
+        images = await get_food_images(get_http_client(), [item["name"] for item in missing])
+        for item, image in zip(missing, images):
+            item["image"] = image
 
-        # ⭐ Return food name + image
-        results = [
-            {"name": f, "image": get_food_image(f)}
-            for f in foods
-        ]
+    return {"items": items}
+
+
+@app.get("/api/recommendations/{user_id}")
+async def get_recommendations(user_id: int):
+    try:
+        return await _recommendation_items(user_id)
+
+    except Exception as e:
+        return {"error": str(e)}
 
-        return {"items": results}
+
+@app.get("/api/recommendations/name/{username}")
+async def get_recommendations_by_name(username: str):
+    # Kept for older app builds: resolve the name to an id (indexed), then as above
+    try:
+        def find_user_id():
+            db = database.SessionLocal()
+            try:
+                user = db.query(models.Users.id).filter(models.Users.name == username).first()
+                return user[0] if user else None
+            finally:
+                db.close()
+
+        return await _recommendation_items(await asyncio.to_thread(find_user_id))
 
     except Exception as e:
         return {"error": str(e)}
 
 
+# ==============================================
+# 📊 Metrics
+# ==============================================
+@app.get("/api/metrics")
+def get_metrics():
+    return {
+        "db_pool": database.pool_metrics(),
+        "prediction_cache": prediction_cache.stats(),
+        "http_pool": http_pool.stats(),
+        "translation_memory": translation_memory.stats(),
+        "deepl_batches": batch_stats.stats(),
+        "food_images": food_images.stats(),
+        "image_pipeline": image_pipeline.stats(),
+        "image_variants": image_variants.stats(),
+        "classifier": {
+            "backend": classifier.name,
+            "fallbacks": getattr(classifier, "fallbacks", 0),
+            "batching": classification_batcher.stats(),
+        },
+        "password_hashing": password_hasher.stats(),
+        "recommender": recommender.last_run,
+        "google_userinfo_cache": google_userinfo.stats(),
+        "upstreams": {u.name: u.stats() for u in upstreams},
+        "single_flight": {
+            f.name: f.stats() for f in (search_flight, recipe_flight, translation_flight)
+        },
+    }
+
+
 # ==============================================
 # 🏠 Home Route
 # ==============================================
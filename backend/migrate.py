@@ -0,0 +1,224 @@
+"""
+Numbered SQL migrations for backend/migrations/.
+
+Files named NNN_description.sql are applied once each, in order, and recorded
+in the schema_migrations table. Unnumbered scripts in that folder are manual
+helpers and are ignored.
+
+    python -m backend.migrate               # apply pending migrations
+    python -m backend.migrate --status      # list applied / pending
+    python -m backend.migrate --mark-applied 001 002
+                                            # record migrations already run by hand
+
+On an empty database the tables are created from models.py, which already
+matches the latest schema, and every migration is recorded as applied.
+
+MySQL commits DDL implicitly, so a migration that fails half-way leaves some of
+its statements applied. Re-running it is safe: ADD COLUMN / CREATE INDEX
+statements whose column or index already exists are skipped, and the data
+statements are written to be re-runnable. Keep one column per ADD COLUMN so
+that check stays exact.
+"""
+import os
+import re
+import sys
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+
+from . import models
+from .database import engine
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+_NUMBERED = re.compile(r"^(\d{3})_.+\.sql$")
+# Seconds a worker waits for another one that is already migrating
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", "60"))
+
+
+def migration_files() -> list[tuple[str, Path]]:
+    files = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = _NUMBERED.match(path.name)
+        if match:
+            files.append((match.group(1), path))
+    return files
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a migration file on `;` at line ends, dropping `--` comment lines."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    statements = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [s.strip() for s in statements if s.strip()]
+
+
+def _ensure_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(16) PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        ")"
+    ))
+
+
+def _applied(conn) -> set[str]:
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def _record(conn, version: str, name: str):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:v, :n)"),
+        {"v": version, "n": name},
+    )
+
+
+class MigrationLockTimeout(RuntimeError):
+    """Another process held the migration lock for longer than MIGRATION_LOCK_TIMEOUT."""
+
+
+def _lock(conn, acquire: bool):
+    # Several workers may start at once; MySQL named locks serialize them
+    if conn.dialect.name != "mysql":
+        return
+    if acquire:
+        # 1 = acquired, 0 = timed out, NULL = error; never migrate without the lock
+        got = conn.execute(
+            text("SELECT GET_LOCK('schema_migrations', :timeout)"), {"timeout": MIGRATION_LOCK_TIMEOUT}
+        ).scalar()
+        if got != 1:
+            raise MigrationLockTimeout(
+                f"Could not acquire the schema_migrations lock within {MIGRATION_LOCK_TIMEOUT}s "
+                "(another worker is still migrating?)"
+            )
+    else:
+        conn.execute(text("SELECT RELEASE_LOCK('schema_migrations')"))
+
+
+_ADD_COLUMN = re.compile(r"^ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)\b", re.IGNORECASE)
+_CREATE_INDEX = re.compile(r"^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(\w+)\s+ON\s+(\w+)\b", re.IGNORECASE)
+
+
+def _already_applied(conn, statement: str) -> bool:
+    """
+    True for DDL whose effect is already in the database (ADD COLUMN of an
+    existing column, CREATE INDEX of an existing index). A migration that died
+    half-way can then simply be re-run; DML in the migrations is written to be
+    re-runnable on its own.
+    """
+    # Fresh inspector each time: the previous statement may have changed the schema
+    inspector = inspect(conn)
+    match = _ADD_COLUMN.match(statement)
+    if match:
+        table, column = match.groups()
+        return column in {c["name"] for c in inspector.get_columns(table)}
+    match = _CREATE_INDEX.match(statement)
+    if match:
+        index, table = match.groups()
+        return index in {i["name"] for i in inspector.get_indexes(table)}
+    return False
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Columns mapped in models.py are missing from the database."""
+
+
+def missing_columns(conn) -> list[str]:
+    """'table.column' for every mapped column that an existing table lacks."""
+    inspector = inspect(conn)
+    missing = []
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        missing += [f"{table.name}.{c.name}" for c in table.columns if c.name not in existing]
+    return missing
+
+
+def check_schema(bind=engine):
+    """
+    Fail at startup, not on the first query, when the code maps columns the
+    database does not have yet (e.g. community_posts.like_count before 002).
+    """
+    with bind.connect() as conn:
+        missing = missing_columns(conn)
+    if missing:
+        raise SchemaOutOfDate(
+            f"Database is missing columns {', '.join(missing)}: "
+            "run `python -m backend.migrate` (see backend/migrations/)"
+        )
+
+
+def run(bind=engine) -> list[str]:
+    """Apply pending migrations, then create any model tables that are still missing."""
+    applied_now = []
+    with bind.connect() as conn:
+        _lock(conn, True)
+        try:
+            fresh = not inspect(conn).has_table("users")
+            _ensure_table(conn)
+            conn.commit()
+
+            if fresh:
+                models.Base.metadata.create_all(bind=conn)
+                for version, path in migration_files():
+                    _record(conn, version, path.name)
+                conn.commit()
+                print("🗄️ Empty database: created schema from models")
+                return applied_now
+
+            done = _applied(conn)
+            for version, path in migration_files():
+                if version in done:
+                    continue
+                print(f"🗄️ Applying migration {path.name}")
+                # MySQL DDL commits implicitly, so each statement is its own step
+                for statement in split_statements(path.read_text(encoding="utf-8")):
+                    if _already_applied(conn, statement):
+                        print(f"   ↪ skipped, already in place: {statement.splitlines()[0]}")
+                        continue
+                    conn.execute(text(statement))
+                _record(conn, version, path.name)
+                conn.commit()
+                applied_now.append(version)
+
+            # New tables without a migration of their own (caches etc.)
+            models.Base.metadata.create_all(bind=conn)
+            conn.commit()
+        finally:
+            _lock(conn, False)
+    check_schema(bind)
+    return applied_now
+
+
+def status(bind=engine) -> list[tuple[str, str, bool]]:
+    with bind.connect() as conn:
+        _ensure_table(conn)
+        conn.commit()
+        done = _applied(conn)
+    return [(version, path.name, version in done) for version, path in migration_files()]
+
+
+def mark_applied(versions: list[str], bind=engine):
+    known = dict(migration_files())
+    with bind.connect() as conn:
+        _ensure_table(conn)
+        done = _applied(conn)
+        for version in versions:
+            if version not in known:
+                raise SystemExit(f"Unknown migration {version}")
+            if version not in done:
+                _record(conn, version, known[version].name)
+        conn.commit()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--status"]:
+        for version, name, applied in status():
+            print(f"{'✅' if applied else '⏳'} {name}")
+    elif args[:1] == ["--mark-applied"]:
+        mark_applied(args[1:])
+        print(f"✅ Marked as applied: {', '.join(args[1:])}")
+    else:
+        applied = run()
+        print(f"✅ Applied {len(applied)} migration(s)" if applied else "✅ Schema is up to date")
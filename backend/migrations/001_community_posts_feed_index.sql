@@ -0,0 +1,8 @@
+-- =============================================
+-- Feed keyset pagination index (MySQL)
+-- =============================================
+-- /api/community/posts and /posts/feed page with
+--   WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT n
+-- so each page is a short range scan on this index.
+
+CREATE INDEX ix_community_posts_created_at_id ON community_posts (created_at, id);
@@ -0,0 +1,20 @@
+-- =============================================
+-- Denormalized like / comment counters (MySQL)
+-- =============================================
+-- Maintained by the like / unlike / comment endpoints.
+-- Required on existing databases before deploying code that maps these
+-- columns: run `python -m backend.migrate` (applied automatically at startup
+-- unless DB_MIGRATE_ON_STARTUP=0). If you apply this file by hand instead,
+-- record it with `python -m backend.migrate --mark-applied 002`.
+-- Drift can be repaired at any time with:
+--   python -m backend.services.counters
+
+-- One column per statement so a re-run after a partial failure skips exactly
+-- the columns that already exist
+ALTER TABLE community_posts ADD COLUMN like_count INT NOT NULL DEFAULT 0;
+ALTER TABLE community_posts ADD COLUMN comment_count INT NOT NULL DEFAULT 0;
+
+-- Backfill from the existing rows
+UPDATE community_posts AS p
+SET like_count = (SELECT COUNT(*) FROM post_likes l WHERE l.post_id = p.id),
+    comment_count = (SELECT COUNT(*) FROM post_comments c WHERE c.post_id = p.id);
@@ -0,0 +1,29 @@
+-- =============================================
+-- Indexes for hot lookup / sort columns (MySQL)
+-- =============================================
+-- Compare plans before and after with:
+--   python -m backend.explain_queries
+-- Captured output: 003_hot_lookup_indexes.explain.txt
+
+-- Likes: one row per (post, user). Remove duplicates first, keeping the oldest.
+DELETE l1 FROM post_likes l1
+JOIN post_likes l2
+  ON l1.post_id = l2.post_id AND l1.user_id = l2.user_id AND l1.id > l2.id;
+
+-- "Already liked?" / is_liked checks become a single unique-index probe
+CREATE UNIQUE INDEX ux_post_likes_post_user ON post_likes (post_id, user_id);
+-- A user's likes (account deletion, "my likes")
+CREATE INDEX ix_post_likes_user_post ON post_likes (user_id, post_id);
+
+-- Comments of a post, oldest first
+CREATE INDEX ix_post_comments_post_created ON post_comments (post_id, created_at);
+
+-- Notification list of a user, newest first
+CREATE INDEX ix_notifications_user_created ON notifications (user_id, created_at);
+
+-- Recommendations by user name
+CREATE INDEX ix_users_name ON users (name);
+
+-- Counters may have counted the removed duplicates
+UPDATE community_posts p
+SET like_count = (SELECT COUNT(*) FROM post_likes l WHERE l.post_id = p.id);
@@ -0,0 +1,32 @@
+-- =============================================
+-- Normalized favorites: user_favorite_foods (MySQL 8)
+-- =============================================
+-- Replaces the comma-joined users.favorite_foods string, which is no longer
+-- written. The old column is kept for now so this can be rolled back.
+
+CREATE TABLE IF NOT EXISTS user_favorite_foods (
+    user_id INT NOT NULL,
+    food_name VARCHAR(255) NOT NULL,
+    position INT NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, food_name),
+    KEY ix_user_favorite_foods_food_user (food_name, user_id),
+    CONSTRAINT fk_user_favorite_foods_user FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Backfill: split "a,b,c" into one row per food, keeping the original order
+INSERT IGNORE INTO user_favorite_foods (user_id, food_name, position)
+WITH RECURSIVE split (user_id, position, food_name, rest) AS (
+    SELECT id, 0,
+           TRIM(SUBSTRING_INDEX(favorite_foods, ',', 1)),
+           SUBSTRING(favorite_foods, CHAR_LENGTH(SUBSTRING_INDEX(favorite_foods, ',', 1)) + 2)
+    FROM users
+    WHERE favorite_foods IS NOT NULL AND favorite_foods <> ''
+    UNION ALL
+    SELECT user_id, position + 1,
+           TRIM(SUBSTRING_INDEX(rest, ',', 1)),
+           SUBSTRING(rest, CHAR_LENGTH(SUBSTRING_INDEX(rest, ',', 1)) + 2)
+    FROM split
+    WHERE rest <> ''
+)
+SELECT user_id, food_name, position FROM split WHERE food_name <> '';
@@ -0,0 +1,12 @@
+-- =============================================
+-- Time-invariant trending score (MySQL)
+-- =============================================
+-- score used to be a decayed like count, valid only as of score_updated_at.
+-- It is now log2(likes) + hours since 2026-01-01 of the last like / 72
+-- (TRENDING_EPOCH / TRENDING_HALF_LIFE_HOURS in services/trending.py).
+-- score_updated_at is the best record of the last like we have.
+-- Re-running it is harmless; rerun it by hand if TRENDING_HALF_LIFE_HOURS changes.
+
+UPDATE dish_trends
+SET score = LOG2(GREATEST(likes, 1))
+    + TIMESTAMPDIFF(SECOND, '2026-01-01 00:00:00', COALESCE(score_updated_at, UTC_TIMESTAMP())) / (3600 * 72);
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -14,7 +14,7 @@ class Users(Base):
 
     # Google login fields
     google_id = Column(String(255), nullable=True)
-    name = Column(String(255), nullable=True)
+    name = Column(String(255), nullable=True, index=True)
 
     # Email login
     email = Column(String(255), unique=True, nullable=False)
@@ -23,6 +23,9 @@ class Users(Base):
     # Profile
     profile_image = Column(String(500), nullable=True)
 
+    # Legacy comma-separated favorites; replaced by user_favorite_foods (migration 004)
+    favorite_foods = Column(Text, nullable=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -58,8 +61,20 @@ class CommunityPost(Base):
     dish_image = Column(Text, nullable=False)
     opinion = Column(Text)
 
+    # Denormalized counters, maintained by the like / comment endpoints.
+    # Existing databases need migrations/002_community_posts_counters.sql before
+    # this code runs (python -m backend.migrate, or apply the file by hand and
+    # record it with --mark-applied 002); create_all never adds columns.
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Keyset pagination of the feeds (ORDER BY created_at DESC, id DESC)
+        Index("ix_community_posts_created_at_id", "created_at", "id"),
+    )
+
 
 # =========================
 # Post Likes
@@ -72,6 +87,12 @@ class PostLike(Base):
     post_id = Column(Integer, ForeignKey("community_posts.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
+    __table_args__ = (
+        # One like per (post, user); "already liked?" is a single index probe
+        Index("ux_post_likes_post_user", "post_id", "user_id", unique=True),
+        Index("ix_post_likes_user_post", "user_id", "post_id"),
+    )
+
 
 # =========================
 # Post Comments
@@ -89,6 +110,10 @@ class PostComment(Base):
     # 返信機能用 (自己参照)
     parent_id = Column(Integer, ForeignKey("post_comments.id"), nullable=True)
 
+    __table_args__ = (
+        Index("ix_post_comments_post_created", "post_id", "created_at"),
+    )
+
 
 # =========================
 # Notifications
@@ -110,3 +135,123 @@ class Notification(Base):
     
     read = Column(Integer, default=0) # 0: unread, 1: read
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_notifications_user_created", "user_id", "created_at"),
+    )
+
+
+# =========================
+# Recipes (Spoonacular cache)
+# =========================
+
+class Recipe(Base):
+    __tablename__ = "recipes"
+
+    # Spoonacular recipe id
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+    title = Column(String(500))
+    image = Column(String(500))
+    source_url = Column(String(1000))
+
+    # Normalized payload (title, instructions, ingredients ...) as JSON
+    payload = Column(Text, nullable=False)
+
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# =========================
+# Translation Memory (DeepL cache)
+# =========================
+
+class TranslationMemory(Base):
+    __tablename__ = "translation_memory"
+
+    # sha256 of the source text
+    source_hash = Column(String(64), primary_key=True)
+    target_lang = Column(String(10), primary_key=True)
+
+    source_text = Column(Text, nullable=False)
+    translated_text = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# =========================
+# Dish Trends (trending aggregate)
+# =========================
+
+class DishTrend(Base):
+    __tablename__ = "dish_trends"
+
+    dish_name = Column(String(255), primary_key=True)
+
+    # Total likes across all posts of this dish
+    likes = Column(Integer, nullable=False, default=0, index=True)
+
+    # Time-invariant trending score: log2(likes) + recency of the last like
+    # (see services/trending.py); ordering by it is exact at any time
+    score = Column(Float, nullable=False, default=0.0, index=True)
+    # Time of the last like (or of the row's creation)
+    score_updated_at = Column(DateTime(timezone=True))
+
+    # Representative post (first post of the dish)
+    post_id = Column(Integer)
+    image = Column(Text)
+
+
+# =========================
+# Food Images (Spoonacular image lookup cache)
+# =========================
+
+class FoodImage(Base):
+    __tablename__ = "food_images"
+
+    # Normalized (lowercase) food name
+    food_name = Column(String(255), primary_key=True)
+
+    # NULL when Spoonacular had no result (negative cache)
+    image_url = Column(String(500))
+
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# =========================
+# Account Deletion Jobs (large accounts are deleted in the background)
+# =========================
+
+class AccountDeletionJob(Base):
+    __tablename__ = "account_deletion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+
+    # pending, running, done, failed
+    status = Column(String(20), nullable=False, default="pending")
+    total_rows = Column(Integer, nullable=False, default=0)
+    deleted_rows = Column(Integer, nullable=False, default=0)
+    error = Column(String(500))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# =========================
+# User Favorite Foods (one row per user × food)
+# =========================
+
+class UserFavoriteFood(Base):
+    __tablename__ = "user_favorite_foods"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    food_name = Column(String(255), primary_key=True)
+
+    # Order the foods were chosen in
+    position = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # "Who likes X" lookups for recommendations
+        Index("ix_user_favorite_foods_food_user", "food_name", "user_id"),
+    )
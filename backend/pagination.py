@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Paging is opt-in: without `limit` or `cursor` the feeds return every row,
+# as the current mobile clients expect
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Response header carrying the cursor for the next page (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for keyset pagination on (created_at, id)."""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | None, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_size(cursor: str | None, limit: int | None) -> int | None:
+    """Requested page size; None (no paging) when the client sent neither limit nor cursor."""
+    if limit is None and cursor is None:
+        return None
+    return limit or DEFAULT_PAGE_SIZE
+
+
+def keyset_page(query, created_col, id_col, cursor: str | None, limit: int | None):
+    """
+    Newest-first page of `query` after `cursor`, or every row when `limit` is None.
+    Fetches one extra row to know whether another page exists.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                created_col < created_at,
+                and_(created_col == created_at, id_col < row_id)
+            )
+        )
+
+    query = query.order_by(created_col.desc(), id_col.desc())
+    if limit is None:
+        return query.all()
+    return query.limit(limit + 1).all()
+
+
+def next_cursor(rows: list, limit: int | None, key) -> str | None:
+    """Trim the look-ahead row and return the cursor for the next page, if any."""
+    if limit is None or len(rows) <= limit:
+        return None
+    del rows[limit:]
+    created_at, row_id = key(rows[-1])
+    return encode_cursor(created_at, row_id)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from .. import models, database
-from ..auth_utils import hash_password, verify_password
+from ..auth_utils import hash_password_async, verify_password_async, PasswordHasherBusy
 from ..auth_jwt import create_access_token
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -27,32 +28,43 @@ class LoginRequest(BaseModel):
 # Register API
 # =========================
 @router.post("/register")
-def register_user(
+async def register_user(
     request: RegisterRequest,
     db: Session = Depends(database.get_db)
 ):
+    # DB work runs in the threadpool; only bcrypt goes to the dedicated pool
+    def find_user():
+        return db.query(models.Users).filter(
+            models.Users.email == request.email
+        ).first()
+
     # Check duplicate email
-    user = db.query(models.Users).filter(
-        models.Users.email == request.email
-    ).first()
+    user = await run_in_threadpool(find_user)
 
     if user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # Hash password
-    hashed_pw = hash_password(request.password)
+    # Hash password (dedicated bcrypt pool)
+    try:
+        hashed_pw = await hash_password_async(request.password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
 
     # Create user
-    new_user = models.Users(
-        name=request.name,
-        email=request.email,
-        password_hash=hashed_pw,
-        google_id=None
-    )
+    def create_user():
+        new_user = models.Users(
+            name=request.name,
+            email=request.email,
+            password_hash=hashed_pw,
+            google_id=None
+        )
+
+        db.add(new_user)
+        db.commit()
+        db.refresh(new_user)
+        return new_user
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await run_in_threadpool(create_user)
 
     # DEBUG LOG (you can remove later)
     print("🔥 REGISTER DEBUG USER_ID =", new_user.id)
@@ -69,13 +81,16 @@ def register_user(
 # Login API
 # =========================
 @router.post("/login")
-def login_user(
+async def login_user(
     request: LoginRequest,
     db: Session = Depends(database.get_db)
 ):
-    user = db.query(models.Users).filter(
-        models.Users.email == request.email
-    ).first()
+    def find_user():
+        return db.query(models.Users).filter(
+            models.Users.email == request.email
+        ).first()
+
+    user = await run_in_threadpool(find_user)
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -83,7 +98,12 @@ def login_user(
     if user.password_hash is None:
         raise HTTPException(status_code=400, detail="Please login with Google")
 
-    if not verify_password(request.password, user.password_hash):
+    try:
+        password_ok = await verify_password_async(request.password, user.password_hash)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+    if not password_ok:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_access_token({"sub": user.email})
@@ -1,24 +1,28 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import requests
 
 from ..database import get_db
 from ..models import Users
+from ..services.google_userinfo import fetch_userinfo, GoogleUnavailable
 
 router = APIRouter(prefix="/auth", tags=["Google Auth"])
 
 @router.post("/google")
-def google_login(data: dict, db: Session = Depends(get_db)):
+async def google_login(data: dict, db: Session = Depends(get_db)):
     access_token = data.get("access_token")
 
     if not access_token:
         raise HTTPException(status_code=400, detail="Access token missing")
 
-    # 1️⃣ Get user info from Google
-    google_info = requests.get(
-        "https://www.googleapis.com/oauth2/v3/userinfo",
-        headers={"Authorization": f"Bearer {access_token}"}
-    ).json()
+    # 1️⃣ Get user info from Google (cached briefly per access token)
+    try:
+        google_info = await fetch_userinfo(access_token)
+    except GoogleUnavailable as e:
+        print(f"⚠️ Google userinfo failed: {e}")
+        raise HTTPException(status_code=503, detail="Google sign-in is temporarily unavailable")
+
+    google_info = google_info or {}
 
     google_id = google_info.get("sub")
     email = google_info.get("email")
@@ -27,21 +31,26 @@ def google_login(data: dict, db: Session = Depends(get_db)):
     if not email:
         raise HTTPException(status_code=400, detail="Unable to fetch Google account info")
 
-    # 2️⃣ Check if user exists (Google OR normal)
-    user = db.query(Users).filter(Users.email == email).first()
-
-    # 3️⃣ Create new Google user
-    if not user:
-        new_user = Users(
-            google_id=google_id,
-            name=name,
-            email=email,
-            password_hash=None  # Google users don't use password
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        user = new_user
+    # DB work runs in the threadpool so the event loop keeps serving other requests
+    def find_or_create_user():
+        # 2️⃣ Check if user exists (Google OR normal)
+        user = db.query(Users).filter(Users.email == email).first()
+
+        # 3️⃣ Create new Google user
+        if not user:
+            new_user = Users(
+                google_id=google_id,
+                name=name,
+                email=email,
+                password_hash=None  # Google users don't use password
+            )
+            db.add(new_user)
+            db.commit()
+            db.refresh(new_user)
+            user = new_user
+        return user
+
+    user = await run_in_threadpool(find_or_create_user)
 
     # 4️⃣ Return user
     return {
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import exists, literal
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from ..database import get_db
+from ..pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page, next_cursor, page_size
 from .. import models
+from ..services import counters, trending
+from ..services.image_variants import variant_urls
 
 router = APIRouter(prefix="/api/community", tags=["Community"])
 
@@ -38,6 +43,8 @@ def create_post(request: CreatePostRequest, db: Session = Depends(get_db)):
         opinion=request.opinion
     )
     db.add(post)
+    db.flush()
+    trending.record_post(db, post)
     db.commit()
     db.refresh(post)
     return {"message": "Post created", "post_id": post.id}
@@ -48,53 +55,51 @@ def create_post(request: CreatePostRequest, db: Session = Depends(get_db)):
 # =====================
 
 @router.get("/posts")
-def get_posts(user_id: int | None = None, db: Session = Depends(get_db)):
+def get_posts(
+    response: Response,
+    user_id: int | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    if user_id:
+        is_liked = exists().where(
+            models.PostLike.post_id == models.CommunityPost.id,
+            models.PostLike.user_id == user_id
+        )
+    else:
+        is_liked = literal(False)
+
     # Join with Users to get creator name
-    posts = (
+    query = (
         db.query(
             models.CommunityPost,
-            models.Users.name.label("user_name")
+            models.Users.name.label("user_name"),
+            is_liked.label("is_liked")
         )
         .join(models.Users, models.CommunityPost.user_id == models.Users.id)
-        .order_by(models.CommunityPost.created_at.desc())
-        .all()
     )
 
-    result = []
-    for post, user_name in posts:
-        likes_count = (
-            db.query(models.PostLike)
-            .filter(models.PostLike.post_id == post.id)
-            .count()
-        )
-        comments_count = (
-            db.query(models.PostComment)
-            .filter(models.PostComment.post_id == post.id)
-            .count()
-        )
-        
-        is_liked = False
-        if user_id:
-            user_like = (
-                db.query(models.PostLike)
-                .filter(
-                    models.PostLike.post_id == post.id,
-                    models.PostLike.user_id == user_id
-                )
-                .first()
-            )
-            is_liked = True if user_like else False
+    # Opt-in keyset pagination on (created_at, id); the next cursor is returned in a header
+    limit = page_size(cursor, limit)
+    rows = keyset_page(query, models.CommunityPost.created_at, models.CommunityPost.id, cursor, limit)
+    cursor_out = next_cursor(rows, limit, lambda row: (row[0].created_at, row[0].id))
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
 
+    result = []
+    for post, user_name, is_liked in rows:
         result.append({
             "id": post.id,
             "dish_name": post.dish_name,
             "dish_image": post.dish_image,
+            "dish_image_variants": variant_urls(post.dish_image),
             "opinion": post.opinion,
             "user_id": post.user_id,
             "user_name": user_name or f"User #{post.user_id}",
-            "likes": likes_count,
-            "is_liked": is_liked,
-            "comments": comments_count,
+            "likes": post.like_count,
+            "is_liked": bool(is_liked),
+            "comments": post.comment_count,
             "created_at": post.created_at,
         })
 
@@ -128,6 +133,14 @@ def like_post(post_id: int, user_id: int, db: Session = Depends(get_db)):
     # 3. Add Like
     like = models.PostLike(post_id=post_id, user_id=user_id)
     db.add(like)
+    try:
+        db.flush()
+    except IntegrityError:
+        # A concurrent request inserted the same like (unique post_id, user_id)
+        db.rollback()
+        return {"message": "Already liked"}
+    counters.bump_likes(db, post_id, +1)
+    trending.record_like(db, post, +1)
     
     # 4. Create Notification for Post Owner (if not self-like)
     if post.user_id != user_id:
@@ -161,6 +174,10 @@ def unlike_post(post_id: int, user_id: int, db: Session = Depends(get_db)):
 
     if existing:
         db.delete(existing)
+        counters.bump_likes(db, post_id, -1)
+        post = db.query(models.CommunityPost).filter(models.CommunityPost.id == post_id).first()
+        if post:
+            trending.record_like(db, post, -1)
         db.commit()
         return {"message": "Unliked"}
     
@@ -172,47 +189,20 @@ def unlike_post(post_id: int, user_id: int, db: Session = Depends(get_db)):
 # =====================
 
 @router.get("/trending")
-def get_trending(db: Session = Depends(get_db)):
-    # Get all posts and group by dish_name to avoid duplicates
-    posts = db.query(models.CommunityPost).all()
-    
-    # Group posts by dish_name and aggregate likes
-    dish_map = {}  # {dish_name: {"name", "image", "likes", "post_ids"}}
-    
-    for post in posts:
-        dish_name = post.dish_name
-        likes_count = db.query(models.PostLike).filter(models.PostLike.post_id == post.id).count()
-        
-        if dish_name not in dish_map:
-            dish_map[dish_name] = {
-                "name": dish_name,
-                "image": post.dish_image,
-                "likes": likes_count,
-                "post_ids": [post.id]
-            }
-        else:
-            # Aggregate likes from all posts with same dish name
-            dish_map[dish_name]["likes"] += likes_count
-            dish_map[dish_name]["post_ids"].append(post.id)
-            # Use the image from the post with most likes
-            if likes_count > 0 and not dish_map[dish_name]["image"]:
-                dish_map[dish_name]["image"] = post.dish_image
-    
-    # Convert to list and sort by total likes
-    trending_list = list(dish_map.values())
-    trending_list.sort(key=lambda x: x["likes"], reverse=True)
-    
-    # Return top 5, with just the first post_id for reference
-    result = []
-    for item in trending_list[:5]:
-        result.append({
-            "name": item["name"],
-            "image": item["image"],
-            "likes": item["likes"],
-            "id": item["post_ids"][0]  # Use first post id
-        })
-    
-    return result
+def get_trending(sort: str = Query("likes", pattern="^(likes|score)$"), db: Session = Depends(get_db)):
+    # Served from the dish_trends aggregate, maintained on like/unlike and by the periodic job.
+    # sort=score ranks by log-likes plus recency of the last like instead of all-time totals.
+    trends = trending.top_dishes(db, k=5, sort=sort)
+
+    return [
+        {
+            "name": t.dish_name,
+            "image": t.image,
+            "likes": t.likes,
+            "id": t.post_id
+        }
+        for t in trends
+    ]
 
 
 # =====================
@@ -259,6 +249,7 @@ def comment_post(
         parent_id=request.parent_id
     )
     db.add(comment)
+    counters.bump_comments(db, post_id, +1)
     db.commit()
     db.refresh(comment)
 
@@ -1,11 +1,17 @@
 import os
 import uuid
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from ..database import get_db
+from ..pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, keyset_page, next_cursor, page_size
+from ..static_files import cached_file_response
 from .. import models
+from ..services import counters, trending
+from ..services.image_variants import schedule_variants, variant_urls
+from ..services.uploads import save_upload
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
@@ -26,68 +32,79 @@ async def create_post(
     file_name = f"{uuid.uuid4()}.{file_ext}"
     file_path = os.path.join(UPLOAD_DIR, file_name)
 
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    await save_upload(file, file_path)
+    image_url = f"/uploads/{file_name}"
+    # thumb / small / medium WebP are rendered in the background
+    schedule_variants(image_url)
+
+    # DB work (including the dish_trends row update) runs in the threadpool
+    def insert_post():
+        new_post = models.CommunityPost(
+            user_id=user_id,
+            dish_name="Uploaded Dish",
+            dish_image=image_url,
+            opinion=caption
+        )
 
-    new_post = models.CommunityPost(
-        user_id=user_id,
-        dish_name="Uploaded Dish",
-        dish_image=f"/uploads/{file_name}",
-        opinion=caption
-    )
+        db.add(new_post)
+        db.flush()
+        trending.record_post(db, new_post)
+        db.commit()
+        db.refresh(new_post)
+        return new_post
 
-    db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    new_post = await run_in_threadpool(insert_post)
 
     return {
         "message": "Post created",
-        "post_id": new_post.id
+        "post_id": new_post.id,
+        "dish_image_variants": variant_urls(image_url),
     }
 
 # -------------------------------------------
 # Serve uploaded images
 # -------------------------------------------
 @router.get("/uploads/{filename}")
-def get_uploaded_file(filename: str):
+def get_uploaded_file(filename: str, request: Request):
     file_path = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(file_path):
+    if not os.path.isfile(file_path):
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
+    return cached_file_response(request, file_path)
 
 # -------------------------------------------
 # Community Feed
 # -------------------------------------------
 @router.get("/feed")
-def get_feed(db: Session = Depends(get_db)):
-    posts = (
-        db.query(models.CommunityPost)
-        .order_by(models.CommunityPost.created_at.desc())
-        .all()
+def get_feed(
+    response: Response,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db)
+):
+    # Opt-in keyset pagination on (created_at, id); the next cursor is returned in a header
+    limit = page_size(cursor, limit)
+    posts = keyset_page(
+        db.query(models.CommunityPost),
+        models.CommunityPost.created_at,
+        models.CommunityPost.id,
+        cursor,
+        limit
     )
+    cursor_out = next_cursor(posts, limit, lambda post: (post.created_at, post.id))
+    if cursor_out:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_out
 
     result = []
 
     for post in posts:
-        likes = (
-            db.query(models.PostLike)
-            .filter(models.PostLike.post_id == post.id)
-            .count()
-        )
-
-        comments = (
-            db.query(models.PostComment)
-            .filter(models.PostComment.post_id == post.id)
-            .count()
-        )
-
         result.append({
             "id": post.id,
             "dish_name": post.dish_name,
             "dish_image": post.dish_image,
+            "dish_image_variants": variant_urls(post.dish_image),
             "opinion": post.opinion,
-            "likes": likes,
-            "comments": comments,
+            "likes": post.like_count,
+            "comments": post.comment_count,
             "created_at": post.created_at,
         })
 
@@ -113,6 +130,18 @@ def like_post(
 
     like = models.PostLike(post_id=post_id, user_id=user_id)
     db.add(like)
+    try:
+        db.flush()
+    except IntegrityError:
+        # A concurrent request inserted the same like (unique post_id, user_id)
+        db.rollback()
+        return {"message": "Already liked"}
+    counters.bump_likes(db, post_id, +1)
+
+    post = db.query(models.CommunityPost).filter_by(id=post_id).first()
+    if post:
+        trending.record_like(db, post, +1)
+
     db.commit()
 
     return {"message": "Liked"}
@@ -134,6 +163,7 @@ def comment_post(
     )
 
     db.add(new_comment)
+    counters.bump_comments(db, post_id, +1)
     db.commit()
 
     return {"message": "Comment added"}
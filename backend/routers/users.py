@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional
-import bcrypt
 import os
-import shutil
+import uuid
 from pathlib import Path
 from ..database import get_db
 from .. import models
+from ..auth_utils import hash_password_async, verify_password_async, PasswordHasherBusy
+from ..services import account_deletion
+from ..services.image_variants import delete_variants, schedule_variants, variant_urls
+from ..services.uploads import save_upload
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -53,6 +57,7 @@ def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         "name": user.name,
         "email": user.email,
         "profile_image": profile_image,
+        "profile_image_variants": variant_urls(profile_image),
         "created_at": user.created_at.isoformat() if user.created_at else None,
     }
 
@@ -97,6 +102,7 @@ def update_profile(
             "name": user.name,
             "email": user.email,
             "profile_image": user.profile_image,
+            "profile_image_variants": variant_urls(user.profile_image),
         }
     }
 
@@ -111,7 +117,11 @@ async def upload_profile_image(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.Users).filter(models.Users.id == user_id).first()
+    # DB work runs in the threadpool so the event loop keeps serving other requests
+    def find_user():
+        return db.query(models.Users).filter(models.Users.id == user_id).first()
+
+    user = await run_in_threadpool(find_user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -121,29 +131,31 @@ async def upload_profile_image(
     if file_ext not in allowed_extensions:
         raise HTTPException(status_code=400, detail="Invalid file type. Only images allowed.")
     
-    # Create unique filename
-    filename = f"user_{user_id}_{int(os.times().system * 1000)}{file_ext}"
+    # Create unique filename (never reused, so it can be cached as immutable)
+    filename = f"user_{user_id}_{uuid.uuid4().hex[:12]}{file_ext}"
     file_path = UPLOAD_DIR / filename
     
+    # Save new file (streamed, size-limited) before touching the old one
+    await save_upload(file, file_path)
+    
     # Delete old profile image if exists
     if user.profile_image:
         old_file = UPLOAD_DIR / os.path.basename(user.profile_image)
-        if old_file.exists():
+        if old_file.exists() and old_file != file_path:
             old_file.unlink()
-    
-    # Save new file
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        delete_variants(user.profile_image)
     
     # Update user profile_image path
     # Store as relative URL path
     image_url = f"/uploads/profiles/{filename}"
     user.profile_image = image_url
-    db.commit()
+    await run_in_threadpool(db.commit)
+    schedule_variants(image_url)
     
     return {
         "message": "Profile image uploaded successfully",
-        "profile_image": image_url
+        "profile_image": image_url,
+        "profile_image_variants": variant_urls(image_url),
     }
 
 
@@ -152,12 +164,16 @@ async def upload_profile_image(
 # =====================
 
 @router.put("/{user_id}/password")
-def change_password(
+async def change_password(
     user_id: int,
     request: ChangePasswordRequest,
     db: Session = Depends(get_db)
 ):
-    user = db.query(models.Users).filter(models.Users.id == user_id).first()
+    # DB work runs in the threadpool; only bcrypt goes to the dedicated pool
+    def find_user():
+        return db.query(models.Users).filter(models.Users.id == user_id).first()
+
+    user = await run_in_threadpool(find_user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -165,14 +181,16 @@ def change_password(
     if not user.password_hash:
         raise HTTPException(status_code=400, detail="Cannot change password for OAuth users")
     
-    if not bcrypt.checkpw(request.current_password.encode('utf-8'), user.password_hash.encode('utf-8')):
-        raise HTTPException(status_code=400, detail="Current password is incorrect")
-    
-    # Hash and update new password
-    new_hash = bcrypt.hashpw(request.new_password.encode('utf-8'), bcrypt.gensalt())
-    user.password_hash = new_hash.decode('utf-8')
+    try:
+        if not await verify_password_async(request.current_password, user.password_hash):
+            raise HTTPException(status_code=400, detail="Current password is incorrect")
+        
+        # Hash and update new password (dedicated bcrypt pool)
+        user.password_hash = await hash_password_async(request.new_password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry")
     
-    db.commit()
+    await run_in_threadpool(db.commit)
     
     return {"message": "Password changed successfully"}
 
@@ -182,42 +200,57 @@ def change_password(
 # =====================
 
 @router.delete("/{user_id}")
-def delete_account(user_id: int, db: Session = Depends(get_db)):
+def delete_account(
+    user_id: int,
+    background_tasks: BackgroundTasks,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    # Repeated DELETEs while a job is in progress get that job, not a new one;
+    # a job whose worker died (no heartbeat) is resumed instead
+    job = account_deletion.active_job(db, user_id)
+    if job:
+        message = "Account deletion already in progress"
+        if account_deletion.is_stale(job):
+            account_deletion.resume_job(db, job)
+            background_tasks.add_task(account_deletion.run_job, job.id)
+            message = "Account deletion resumed"
+        response.status_code = 202
+        return {
+            "message": message,
+            **account_deletion.job_status(job),
+        }
+
     user = db.query(models.Users).filter(models.Users.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Delete profile image if exists
-    if user.profile_image:
-        file_path = UPLOAD_DIR / os.path.basename(user.profile_image)
-        if file_path.exists():
-            file_path.unlink()
-    
-    # Delete related data
-    # 1. Delete user's posts
-    user_posts = db.query(models.CommunityPost).filter(models.CommunityPost.user_id == user_id).all()
-    for post in user_posts:
-        # Delete likes on this post
-        db.query(models.PostLike).filter(models.PostLike.post_id == post.id).delete()
-        # Delete comments on this post
-        db.query(models.PostComment).filter(models.PostComment.post_id == post.id).delete()
-        # Delete the post
-        db.delete(post)
-    
-    # 2. Delete user's likes on other posts
-    db.query(models.PostLike).filter(models.PostLike.user_id == user_id).delete()
-    
-    # 3. Delete user's comments on other posts
-    db.query(models.PostComment).filter(models.PostComment.user_id == user_id).delete()
-    
-    # 4. Delete user's notifications
-    db.query(models.Notification).filter(models.Notification.user_id == user_id).delete()
-    
-    # 5. Delete user's recommendations
-    db.query(models.Recommendations).filter(models.Recommendations.user_id == user_id).delete()
-    
-    # Finally, delete the user
-    db.delete(user)
-    db.commit()
+    # Small accounts: a handful of set-based DELETEs in one transaction
+    total_rows = account_deletion.count_rows(db, user_id)
+    if total_rows <= account_deletion.ACCOUNT_DELETE_SYNC_MAX_ROWS:
+        account_deletion.delete_account_now(db, user)
+        return {"message": "Account deleted successfully"}
+    
+    # Large accounts: chunked background job, progress at GET /{user_id}/deletion
+    job = account_deletion.start_job(db, user_id, total_rows)
+    background_tasks.add_task(account_deletion.run_job, job.id)
+    
+    response.status_code = 202
+    return {
+        "message": "Account deletion started",
+        **account_deletion.job_status(job),
+    }
+
+
+@router.get("/{user_id}/deletion")
+def get_deletion_status(user_id: int, db: Session = Depends(get_db)):
+    job = (
+        db.query(models.AccountDeletionJob)
+        .filter(models.AccountDeletionJob.user_id == user_id)
+        .order_by(models.AccountDeletionJob.id.desc())
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="No deletion job for this user")
     
-    return {"message": "Account deleted successfully"}
+    return account_deletion.job_status(job)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from ..static_files import cached_file_response
+from ..services.image_variants import (
+    DEFAULT_VARIANT_FORMAT, VARIANT_FORMATS, VariantNotFound, variant_or_original
+)
+
+router = APIRouter(prefix="/variants", tags=["Images"])
+
+
+# -------------------------------------------
+# Resized image of an upload (generated on first request)
+# -------------------------------------------
+@router.get("/{size}/{path:path}")
+async def get_variant(
+    size: str,
+    path: str,
+    request: Request,
+    format: str = Query(DEFAULT_VARIANT_FORMAT, pattern="^(webp|jpeg)$")
+):
+    try:
+        image, is_variant = await variant_or_original(path, size, format)
+    except VariantNotFound:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    if not is_variant:
+        # Variant queue is full: send the original, but don't let it be cached as the variant
+        return cached_file_response(request, image, immutable=False)
+    return cached_file_response(request, image, media_type=VARIANT_FORMATS[format][1])
@@ -0,0 +1,269 @@
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+from . import counters, trending
+from .image_variants import delete_variants
+
+# Accounts with more dependent rows than this are deleted by a background job
+ACCOUNT_DELETE_SYNC_MAX_ROWS = int(os.getenv("ACCOUNT_DELETE_SYNC_MAX_ROWS", "5000"))
+# Rows per DELETE (and per transaction) in the background job
+ACCOUNT_DELETE_CHUNK_SIZE = int(os.getenv("ACCOUNT_DELETE_CHUNK_SIZE", "500"))
+# A pending / running job without a heartbeat for this long is presumed dead
+# (worker crashed, process restarted) and is resumed by the next DELETE
+ACCOUNT_DELETE_STALE_SECONDS = int(os.getenv("ACCOUNT_DELETE_STALE_SECONDS", "900"))
+
+PROFILE_UPLOAD_DIR = Path("backend/uploads/profiles")
+
+
+def _own_post_ids(user_id: int):
+    return select(models.CommunityPost.id).where(models.CommunityPost.user_id == user_id)
+
+
+def count_rows(db: Session, user_id: int) -> int:
+    """Rows that deleting this account removes (posts, likes, comments, notifications, ...)."""
+    own_posts = _own_post_ids(user_id)
+    counts = [
+        db.query(func.count(models.CommunityPost.id)).filter(models.CommunityPost.user_id == user_id),
+        db.query(func.count(models.PostLike.id)).filter(
+            (models.PostLike.post_id.in_(own_posts)) | (models.PostLike.user_id == user_id)
+        ),
+        db.query(func.count(models.PostComment.id)).filter(
+            (models.PostComment.post_id.in_(own_posts)) | (models.PostComment.user_id == user_id)
+        ),
+        db.query(func.count(models.Notification.id)).filter(models.Notification.user_id == user_id),
+        db.query(func.count(models.Recommendations.id)).filter(models.Recommendations.user_id == user_id),
+        db.query(func.count()).select_from(models.UserFavoriteFood).filter(models.UserFavoriteFood.user_id == user_id),
+    ]
+    return sum(q.scalar() or 0 for q in counts)
+
+
+def _touched_post_ids(db: Session, user_id: int) -> list[int]:
+    """Other users' posts this user liked or commented on (their counters change)."""
+    touched = union(
+        select(models.PostLike.post_id).where(models.PostLike.user_id == user_id),
+        select(models.PostComment.post_id).where(models.PostComment.user_id == user_id),
+    ).subquery()
+    rows = db.execute(
+        select(touched.c.post_id).where(touched.c.post_id.not_in(_own_post_ids(user_id)))
+    ).all()
+    return [r[0] for r in rows]
+
+
+def _touched_dishes(db: Session, user_id: int) -> set[str]:
+    """Dishes whose trend rows change: the user's own posts and the posts they liked."""
+    own = select(models.CommunityPost.dish_name).where(models.CommunityPost.user_id == user_id)
+    liked = (
+        select(models.CommunityPost.dish_name)
+        .join(models.PostLike, models.PostLike.post_id == models.CommunityPost.id)
+        .where(models.PostLike.user_id == user_id)
+    )
+    return {r[0] for r in db.execute(union(own, liked)).all()}
+
+
+def _remove_profile_image(profile_image: str | None):
+    delete_variants(profile_image)
+    if profile_image:
+        file_path = PROFILE_UPLOAD_DIR / os.path.basename(profile_image)
+        if file_path.exists():
+            file_path.unlink()
+
+
+def _repair_aggregates(db: Session, touched: list[int], dishes: set[str]):
+    # Like / comment counters on other users' posts, then only the affected dish trends
+    # (anything missed, e.g. after a crashed job, is fixed by the periodic trending rebuild)
+    counters.reconcile(db, touched)
+    trending.rebuild_dishes(db, dishes)
+
+
+# =====================
+# Small accounts: one set-based transaction
+# =====================
+
+def delete_account_now(db: Session, user: models.Users):
+    user_id = user.id
+    own_posts = _own_post_ids(user_id)
+    touched = _touched_post_ids(db, user_id)
+    dishes = _touched_dishes(db, user_id)
+
+    # DELETE ... WHERE post_id IN (SELECT id FROM community_posts WHERE user_id = ?)
+    db.query(models.PostLike).filter(models.PostLike.post_id.in_(own_posts)).delete(synchronize_session=False)
+    db.query(models.PostComment).filter(models.PostComment.post_id.in_(own_posts)).delete(synchronize_session=False)
+    db.query(models.PostLike).filter(models.PostLike.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.PostComment).filter(models.PostComment.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.CommunityPost).filter(models.CommunityPost.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.Notification).filter(models.Notification.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.Recommendations).filter(models.Recommendations.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.UserFavoriteFood).filter(models.UserFavoriteFood.user_id == user_id).delete(synchronize_session=False)
+
+    profile_image = user.profile_image
+    db.delete(user)
+    db.commit()
+
+    _remove_profile_image(profile_image)
+    _repair_aggregates(db, touched, dishes)
+
+
+# =====================
+# Large accounts: chunked background job
+# =====================
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _heartbeat(job: models.AccountDeletionJob):
+    job.updated_at = _now()
+
+
+def is_stale(job: models.AccountDeletionJob) -> bool:
+    """No progress recorded for ACCOUNT_DELETE_STALE_SECONDS: the worker is gone."""
+    updated_at = job.updated_at or job.created_at
+    if updated_at is None:
+        return True
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return (_now() - updated_at).total_seconds() > ACCOUNT_DELETE_STALE_SECONDS
+
+
+def _delete_in_chunks(db: Session, job: models.AccountDeletionJob, model, condition) -> int:
+    """Delete rows of `model` matching `condition`, ACCOUNT_DELETE_CHUNK_SIZE ids per transaction."""
+    deleted = 0
+    while True:
+        ids = [r[0] for r in db.query(model.id).filter(condition).limit(ACCOUNT_DELETE_CHUNK_SIZE).all()]
+        if not ids:
+            return deleted
+        db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+        job.deleted_rows += len(ids)
+        _heartbeat(job)
+        db.commit()
+        deleted += len(ids)
+
+
+def active_job(db: Session, user_id: int) -> models.AccountDeletionJob | None:
+    """The user's pending or running deletion job, if any (check is_stale before trusting it)."""
+    return (
+        db.query(models.AccountDeletionJob)
+        .filter(
+            models.AccountDeletionJob.user_id == user_id,
+            models.AccountDeletionJob.status.in_(["pending", "running"])
+        )
+        .order_by(models.AccountDeletionJob.id.desc())
+        .first()
+    )
+
+
+def start_job(db: Session, user_id: int, total_rows: int) -> models.AccountDeletionJob:
+    job = models.AccountDeletionJob(
+        user_id=user_id, status="pending", total_rows=total_rows, deleted_rows=0, updated_at=_now()
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def run_job(job_id: int):
+    """Run (or resume) a deletion job. Safe to call again after a crash: every step is idempotent."""
+    db = SessionLocal()
+    try:
+        job = db.get(models.AccountDeletionJob, job_id)
+        if job is None or job.status == "done":
+            return
+
+        job.status = "running"
+        _heartbeat(job)
+        db.commit()
+        user_id = job.user_id
+
+        try:
+            touched = _touched_post_ids(db, user_id)
+            dishes = _touched_dishes(db, user_id)
+            own_posts = _own_post_ids(user_id)
+
+            _delete_in_chunks(db, job, models.PostLike, models.PostLike.post_id.in_(own_posts))
+            _delete_in_chunks(db, job, models.PostComment, models.PostComment.post_id.in_(own_posts))
+            _delete_in_chunks(db, job, models.PostLike, models.PostLike.user_id == user_id)
+            _delete_in_chunks(db, job, models.PostComment, models.PostComment.user_id == user_id)
+            _delete_in_chunks(db, job, models.CommunityPost, models.CommunityPost.user_id == user_id)
+            _delete_in_chunks(db, job, models.Notification, models.Notification.user_id == user_id)
+            _delete_in_chunks(db, job, models.Recommendations, models.Recommendations.user_id == user_id)
+
+            # Favorites have a composite key and at most a few dozen rows per user
+            job.deleted_rows += (
+                db.query(models.UserFavoriteFood)
+                .filter(models.UserFavoriteFood.user_id == user_id)
+                .delete(synchronize_session=False)
+            )
+            _heartbeat(job)
+            db.commit()
+
+            user = db.get(models.Users, user_id)
+            if user is not None:
+                profile_image = user.profile_image
+                db.delete(user)
+                db.commit()
+                _remove_profile_image(profile_image)
+
+            _heartbeat(job)
+            db.commit()
+            _repair_aggregates(db, touched, dishes)
+
+            job.status = "done"
+            db.commit()
+            print(f"🗑️ Account {user_id} deleted ({job.deleted_rows} rows)")
+        except Exception as e:
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)[:500]
+            db.commit()
+            print(f"❌ Account deletion job {job_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def resume_job(db: Session, job: models.AccountDeletionJob) -> models.AccountDeletionJob:
+    """Hand a stale job to a new worker; run_job picks up where the dead one stopped."""
+    job.status = "pending"
+    job.error = None
+    _heartbeat(job)
+    db.commit()
+    return job
+
+
+def job_status(job: models.AccountDeletionJob) -> dict:
+    return {
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "deleted_rows": job.deleted_rows,
+        "progress": round(min(job.deleted_rows / job.total_rows, 1.0), 3) if job.total_rows else 1.0,
+        "error": job.error,
+    }
+
+
+if __name__ == "__main__":
+    # python -m backend.services.account_deletion        → resume unfinished jobs
+    # python -m backend.services.account_deletion <id>   → run / resume one job
+    if sys.argv[1:]:
+        job_ids = [int(sys.argv[1])]
+    else:
+        db = SessionLocal()
+        try:
+            job_ids = [
+                j.id for j in db.query(models.AccountDeletionJob)
+                .filter(models.AccountDeletionJob.status.in_(["pending", "running", "failed"]))
+                .all()
+            ]
+        finally:
+            db.close()
+    for job_id in job_ids:
+        run_job(job_id)
+    print(f"✅ Processed {len(job_ids)} deletion job(s)")
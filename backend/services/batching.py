@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+
+class BatcherSaturated(RuntimeError):
+    """Raised when the batching queue is full."""
+
+
+class MicroBatcher:
+    """
+    Dynamic batching queue.
+    Callers submit single items; a worker collects up to `max_batch` of them,
+    waiting at most `max_wait_ms` after the first one, and runs `batch_fn`
+    once for the whole batch. Results are fanned back out by position.
+
+    `batch_fn(items)` returns one entry per item; an entry that is an
+    Exception is raised to that item's caller only.
+    """
+
+    def __init__(self, batch_fn, max_batch: int, max_wait_ms: float, max_queue: int, max_concurrent: int = 1):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.max_concurrent = max_concurrent
+
+        self._queue: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._worker: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+        # Successful work only; failures are counted separately
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0   # batch_fn raised: every item of the batch failed
+        self.failed_items = 0     # includes per-item exceptions from a successful batch
+        self.rejected = 0
+        self.largest_batch = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, item):
+        self._ensure_worker()
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise BatcherSaturated("Classification queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Drop callers that gave up while waiting
+        return [(item, fut) for item, fut in batch if not fut.done()]
+
+    async def _run(self):
+        while True:
+            # Hold a slot before collecting so batches keep filling while all slots are busy
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            if not batch:
+                self._slots.release()
+                continue
+
+            task = asyncio.create_task(self._process(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _process(self, batch: list):
+        started = time.perf_counter()
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            self.failed_batches += 1
+            self.failed_items += len(batch)
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            self.batches += 1
+            for (_, fut), result in zip(batch, results):
+                if isinstance(result, BaseException):
+                    self.failed_items += 1
+                    if not fut.done():
+                        fut.set_exception(result)
+                else:
+                    self.items += 1
+                    if not fut.done():
+                        fut.set_result(result)
+        finally:
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.busy_seconds += time.perf_counter() - started
+            self._slots.release()
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for task in list(self._running):
+            task.cancel()
+
+    def stats(self) -> dict:
+        runs = self.batches + self.failed_batches
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "failed_batches": self.failed_batches,
+            "failed_items": self.failed_items,
+            "rejected": self.rejected,
+            "avg_batch_size": round((self.items + self.failed_items) / runs, 2) if runs else 0.0,
+            "largest_batch": self.largest_batch,
+            "avg_batch_ms": round(self.busy_seconds * 1000 / runs, 1) if runs else 0.0,
+            "items_per_busy_second": round(self.items / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+        }
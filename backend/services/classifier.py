@@ -0,0 +1,262 @@
+"""
+Food image classifiers behind one interface.
+
+    remote — HuggingFace inference router (the original behaviour)
+    onnx   — local CPU inference with ONNX Runtime, remote router kept as fallback
+
+The ONNX backend loads the same HUGGINGFACE_MODEL exported ahead of time, e.g.
+
+    optimum-cli export onnx --model $HUGGINGFACE_MODEL $ONNX_MODEL_DIR
+
+which writes model.onnx, config.json (labels) and preprocessor_config.json
+(resize / normalization) into ONNX_MODEL_DIR.
+"""
+import asyncio
+import json
+import os
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from .batching import MicroBatcher
+from .http_client import get_http_client
+from .resilience import huggingface, UpstreamUnavailable
+
+HUGGINGFACE_API_KEY = os.getenv("HUGGINGFACE_API_KEY")
+HUGGINGFACE_MODEL = os.getenv("HUGGINGFACE_MODEL")
+
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "remote")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = let ONNX Runtime decide
+CLASSIFIER_TOP_K = 5
+
+# Micro-batching in front of the classifier
+CLASSIFIER_BATCH_SIZE = int(os.getenv("CLASSIFIER_BATCH_SIZE", "8"))
+CLASSIFIER_BATCH_WAIT_MS = float(os.getenv("CLASSIFIER_BATCH_WAIT_MS", "10"))
+CLASSIFIER_QUEUE_DEPTH = int(os.getenv("CLASSIFIER_QUEUE_DEPTH", "64"))
+CLASSIFIER_CONCURRENT_BATCHES = int(os.getenv("CLASSIFIER_CONCURRENT_BATCHES", "2"))
+
+
+class ClassifierError(RuntimeError):
+    """The classifier could not produce a prediction."""
+
+
+# =====================
+# Remote (HuggingFace router)
+# =====================
+
+class RemoteClassifier:
+    name = "remote"
+
+    async def warmup(self):
+        pass
+
+    async def classify(self, image_jpeg: bytes) -> list[dict]:
+        """Return [{"label", "score"}, ...] sorted by score."""
+        client = get_http_client()
+        hf_url = f"https://router.huggingface.co/hf-inference/models/{HUGGINGFACE_MODEL}"
+        headers = {
+            "Authorization": f"Bearer {HUGGINGFACE_API_KEY}",
+            "Content-Type": "image/jpeg",
+        }
+
+        print("🚀 Sending image to HuggingFace (Async)...")
+        try:
+            res = await huggingface.request(client, "POST", hf_url, headers=headers, content=image_jpeg)
+        except UpstreamUnavailable as e:
+            raise ClassifierError(f"HuggingFace unavailable: {e}")
+
+        try:
+            pred = res.json()
+        except ValueError:
+            raise ClassifierError("Invalid HuggingFace response")
+
+        if not pred or not isinstance(pred, list):
+            raise ClassifierError("No prediction")
+
+        return pred
+
+    async def classify_batch(self, images: list[bytes]) -> list:
+        # The router takes one image per request, so a batch is sent concurrently
+        return await asyncio.gather(*[self.classify(img) for img in images], return_exceptions=True)
+
+
+# =====================
+# Local (ONNX Runtime, CPU)
+# =====================
+
+class OnnxClassifier:
+    name = "onnx"
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        self.model_dir = Path(model_dir)
+        self.threads = threads
+        self.session = None
+
+    def _load(self):
+        if self.session is not None:
+            return
+
+        # Optional dependencies: only needed when CLASSIFIER_BACKEND=onnx
+        import numpy as np
+        import onnxruntime as ort
+
+        self.np = np
+
+        with (self.model_dir / "config.json").open(encoding="utf-8") as f:
+            config = json.load(f)
+        self.labels = {int(k): v for k, v in config["id2label"].items()}
+
+        prep_path = self.model_dir / "preprocessor_config.json"
+        prep = json.loads(prep_path.read_text(encoding="utf-8")) if prep_path.exists() else {}
+
+        size = prep.get("size", 224)
+        if isinstance(size, dict):
+            self.shortest_edge = size.get("shortest_edge")
+            self.size = (size.get("width", self.shortest_edge), size.get("height", self.shortest_edge))
+        else:
+            self.shortest_edge = None
+            self.size = (size, size)
+
+        crop = prep.get("crop_size")
+        if isinstance(crop, dict):
+            crop = (crop.get("width"), crop.get("height"))
+        elif crop:
+            crop = (crop, crop)
+        crop = crop if prep.get("do_center_crop") else None
+        # Every image is center-cropped to this size so a batch always stacks,
+        # even for shortest_edge models without a crop in their config
+        if crop:
+            self.input_size = crop
+        elif self.shortest_edge:
+            self.input_size = (self.shortest_edge, self.shortest_edge)
+        else:
+            self.input_size = self.size
+
+        self.rescale = prep.get("rescale_factor", 1 / 255) if prep.get("do_rescale", True) else 1.0
+        self.mean = np.array(prep.get("image_mean", [0.5, 0.5, 0.5]), dtype=np.float32).reshape(1, 3, 1, 1)
+        self.std = np.array(prep.get("image_std", [0.5, 0.5, 0.5]), dtype=np.float32).reshape(1, 3, 1, 1)
+
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = ort.InferenceSession(
+            str(self.model_dir / "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        print(f"🧠 ONNX classifier loaded from {self.model_dir} ({len(self.labels)} labels)")
+
+    def _to_array(self, image_jpeg: bytes):
+        image = Image.open(BytesIO(image_jpeg)).convert("RGB")
+
+        if self.shortest_edge:
+            w, h = image.size
+            scale = self.shortest_edge / min(w, h)
+            image = image.resize((round(w * scale), round(h * scale)), Image.BILINEAR)
+        else:
+            image = image.resize(self.size, Image.BILINEAR)
+
+        cw, ch = self.input_size
+        w, h = image.size
+        if (w, h) != (cw, ch):
+            left, top = (w - cw) // 2, (h - ch) // 2
+            image = image.crop((left, top, left + cw, top + ch))
+
+        arr = self.np.asarray(image, dtype=self.np.float32) * self.rescale
+        return arr.transpose(2, 0, 1)  # HWC -> CHW
+
+    def _infer(self, images: list[bytes]) -> list[list[dict]]:
+        self._load()
+        np = self.np
+
+        batch = np.stack([self._to_array(img) for img in images])
+        batch = (batch - self.mean) / self.std
+
+        logits = self.session.run(None, {self.input_name: batch.astype(np.float32)})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        results = []
+        for row in probs:
+            top = np.argsort(row)[::-1][:CLASSIFIER_TOP_K]
+            results.append([{"label": self.labels[int(i)], "score": float(row[i])} for i in top])
+        return results
+
+    async def warmup(self):
+        """Load the model and run one dummy inference so the first request is not slow."""
+        buf = BytesIO()
+        Image.new("RGB", (224, 224)).save(buf, format="JPEG")
+        await asyncio.to_thread(self._infer, [buf.getvalue()])
+
+    async def classify(self, image_jpeg: bytes) -> list[dict]:
+        return (await self.classify_batch([image_jpeg]))[0]
+
+    async def classify_batch(self, images: list[bytes]) -> list:
+        # One N-image tensor through the session; ONNX Runtime releases the GIL
+        return await asyncio.to_thread(self._infer, images)
+
+
+# =====================
+# Fallback wrapper
+# =====================
+
+class FallbackClassifier:
+    """Use `primary`, falling back to `fallback` when it fails to load or errors."""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.primary_ok = True
+        self.fallbacks = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.primary.name}+{self.fallback.name}"
+
+    async def warmup(self):
+        try:
+            await self.primary.warmup()
+        except Exception as e:
+            self.primary_ok = False
+            print(f"⚠️ {self.primary.name} classifier unavailable, using {self.fallback.name}: {e}")
+        await self.fallback.warmup()
+
+    async def classify(self, image_jpeg: bytes) -> list[dict]:
+        if self.primary_ok:
+            try:
+                return await self.primary.classify(image_jpeg)
+            except Exception as e:
+                print(f"⚠️ {self.primary.name} classifier failed, falling back: {e}")
+        self.fallbacks += 1
+        return await self.fallback.classify(image_jpeg)
+
+    async def classify_batch(self, images: list[bytes]) -> list:
+        if self.primary_ok:
+            try:
+                return await self.primary.classify_batch(images)
+            except Exception as e:
+                print(f"⚠️ {self.primary.name} classifier failed, falling back: {e}")
+        self.fallbacks += len(images)
+        return await self.fallback.classify_batch(images)
+
+
+def build_classifier():
+    if CLASSIFIER_BACKEND == "onnx":
+        return FallbackClassifier(OnnxClassifier(ONNX_MODEL_DIR, ONNX_THREADS), RemoteClassifier())
+    return RemoteClassifier()
+
+
+classifier = build_classifier()
+
+# Concurrent /predict calls are grouped into one classify_batch call
+classification_batcher = MicroBatcher(
+    classifier.classify_batch,
+    max_batch=CLASSIFIER_BATCH_SIZE,
+    max_wait_ms=CLASSIFIER_BATCH_WAIT_MS,
+    max_queue=CLASSIFIER_QUEUE_DEPTH,
+    max_concurrent=CLASSIFIER_CONCURRENT_BATCHES,
+)
@@ -0,0 +1,75 @@
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+
+
+# =====================
+# Atomic counter updates (called inside the caller's transaction)
+# =====================
+
+def _bump(db: Session, post_id: int, column, delta: int):
+    # Single UPDATE ... SET col = col + delta, clamped at zero
+    db.query(models.CommunityPost).filter(models.CommunityPost.id == post_id).update(
+        {column: case((column + delta < 0, 0), else_=column + delta)},
+        synchronize_session=False
+    )
+
+
+def bump_likes(db: Session, post_id: int, delta: int):
+    _bump(db, post_id, models.CommunityPost.like_count, delta)
+
+
+def bump_comments(db: Session, post_id: int, delta: int):
+    _bump(db, post_id, models.CommunityPost.comment_count, delta)
+
+
+# =====================
+# Reconciliation
+# =====================
+
+def reconcile(db: Session, post_ids: list[int] | None = None) -> int:
+    """
+    Recompute like_count / comment_count from post_likes and post_comments in bulk.
+    Only rows that drifted are written; returns how many were repaired.
+    """
+    actual_likes = (
+        select(func.count(models.PostLike.id))
+        .where(models.PostLike.post_id == models.CommunityPost.id)
+        .scalar_subquery()
+    )
+    actual_comments = (
+        select(func.count(models.PostComment.id))
+        .where(models.PostComment.post_id == models.CommunityPost.id)
+        .scalar_subquery()
+    )
+
+    query = db.query(models.CommunityPost).filter(
+        or_(
+            models.CommunityPost.like_count != actual_likes,
+            models.CommunityPost.comment_count != actual_comments
+        )
+    )
+    if post_ids is not None:
+        if not post_ids:
+            return 0
+        query = query.filter(models.CommunityPost.id.in_(post_ids))
+
+    repaired = query.update(
+        {
+            models.CommunityPost.like_count: actual_likes,
+            models.CommunityPost.comment_count: actual_comments,
+        },
+        synchronize_session=False
+    )
+    db.commit()
+    return repaired
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        print(f"✅ Reconciled counters on {reconcile(db)} posts")
+    finally:
+        db.close()
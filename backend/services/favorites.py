@@ -0,0 +1,78 @@
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+def _food_key(name: str) -> str:
+    # Case- and whitespace-insensitive, like the recommender's item names and
+    # the case-insensitive MySQL collation of food_name
+    return " ".join(name.casefold().split())
+
+
+def clean_foods(foods: list[str]) -> list[str]:
+    """Strip names, drop empties and duplicates (ignoring case), keep the first spelling and the chosen order."""
+    unique: dict[str, str] = {}
+    for food in foods:
+        if food and food.strip():
+            unique.setdefault(_food_key(food), food.strip())
+    return list(unique.values())
+
+
+def _upsert(db: Session, rows: list[dict]):
+    table = models.UserFavoriteFood.__table__
+    if db.bind.dialect.name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        # food_name too: the case-insensitive key matches "sushi" when "Sushi" is
+        # saved, and the latest spelling should win
+        db.execute(
+            stmt.on_duplicate_key_update(food_name=stmt.inserted.food_name, position=stmt.inserted.position),
+            rows,
+        )
+    else:
+        db.execute(table.insert(), rows)
+
+
+def save_favorites(db: Session, user_id: int, foods: list[str]) -> list[str]:
+    """Replace a user's favorites: bulk upsert of the new list, then drop the rest."""
+    foods = clean_foods(foods)
+
+    stale = db.query(models.UserFavoriteFood).filter(models.UserFavoriteFood.user_id == user_id)
+    if foods:
+        stale = stale.filter(models.UserFavoriteFood.food_name.not_in(foods))
+    stale.delete(synchronize_session=False)
+
+    if foods:
+        if db.bind.dialect.name != "mysql":
+            # No portable upsert: clear the kept rows and insert them again
+            db.query(models.UserFavoriteFood).filter(
+                models.UserFavoriteFood.user_id == user_id
+            ).delete(synchronize_session=False)
+        _upsert(db, [
+            {"user_id": user_id, "food_name": food, "position": i}
+            for i, food in enumerate(foods)
+        ])
+
+    db.commit()
+    return foods
+
+
+def get_favorites(db: Session, user_id: int) -> list[str]:
+    rows = (
+        db.query(models.UserFavoriteFood.food_name)
+        .filter(models.UserFavoriteFood.user_id == user_id)
+        .order_by(models.UserFavoriteFood.position)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def users_who_like(db: Session, food_name: str) -> list[int]:
+    """Index-only lookup on (food_name, user_id)."""
+    rows = (
+        db.query(models.UserFavoriteFood.user_id)
+        .filter(models.UserFavoriteFood.food_name == food_name)
+        .all()
+    )
+    return [r[0] for r in rows]
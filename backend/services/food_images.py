@@ -0,0 +1,119 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+import httpx
+
+from .. import models
+from ..database import SessionLocal
+from .cache import LRUCache
+from .resilience import spoonacular
+
+SPOONACULAR_API_KEY = os.getenv("SPOONACULAR_API_KEY")
+
+FOOD_IMAGE_TTL_SECONDS = int(os.getenv("FOOD_IMAGE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Max concurrent Spoonacular lookups per recommendations request
+FOOD_IMAGE_CONCURRENCY = int(os.getenv("FOOD_IMAGE_CONCURRENCY", "5"))
+
+# Memory tier; the food_images table is the persistent tier.
+# Values are (image_url,) so a cached "no image" is distinguishable from a miss.
+_memory = LRUCache(maxsize=2000, ttl=FOOD_IMAGE_TTL_SECONDS)
+
+
+def _key(food_name: str) -> str:
+    return food_name.strip().lower()
+
+
+def _is_fresh(fetched_at: datetime) -> bool:
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - fetched_at).total_seconds() < FOOD_IMAGE_TTL_SECONDS
+
+
+def _load(keys: list[str]) -> dict[str, str | None]:
+    db = SessionLocal()
+    try:
+        rows = db.query(models.FoodImage).filter(models.FoodImage.food_name.in_(keys)).all()
+        return {r.food_name: r.image_url for r in rows if _is_fresh(r.fetched_at)}
+    finally:
+        db.close()
+
+
+def _save(entries: dict[str, str | None]):
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        for food_name, image_url in entries.items():
+            db.merge(models.FoodImage(food_name=food_name, image_url=image_url, fetched_at=now))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _fetch(client: httpx.AsyncClient, food_name: str, semaphore: asyncio.Semaphore) -> tuple[str | None, bool]:
+    """Search Spoonacular for one image. Returns (image_url, ok)."""
+    async with semaphore:
+        try:
+            url = "https://api.spoonacular.com/recipes/complexSearch"
+            params = {"query": food_name, "number": 1, "apiKey": SPOONACULAR_API_KEY}
+            res = await spoonacular.request(client, "GET", url, hedge=True, params=params)
+            data = res.json()
+            if res.status_code != 200:
+                return None, False
+            if data.get("results"):
+                return data["results"][0].get("image"), True
+            return None, True
+        except Exception as e:
+            print("❌ Image fetch error:", e)
+            return None, False
+
+
+async def get_food_images(client: httpx.AsyncClient, food_names: list[str]) -> list[str | None]:
+    """
+    Image URL for each food name (index-aligned).
+    Memory → food_images table → concurrent Spoonacular lookups bounded by FOOD_IMAGE_CONCURRENCY.
+    """
+    keys = [_key(f) for f in food_names]
+    found: dict[str, str | None] = {}
+
+    missing = []
+    for key in dict.fromkeys(keys):
+        hit = _memory.get(key)
+        if hit is not None:
+            found[key] = hit[0]
+        else:
+            missing.append(key)
+
+    if missing:
+        try:
+            stored = await asyncio.to_thread(_load, missing)
+        except Exception as e:
+            print(f"⚠️ Food image cache read failed: {e}")
+            stored = {}
+        for key, url in stored.items():
+            _memory.set(key, (url,))
+            found[key] = url
+        missing = [k for k in missing if k not in stored]
+
+    if missing:
+        semaphore = asyncio.Semaphore(FOOD_IMAGE_CONCURRENCY)
+        fetched = await asyncio.gather(*[_fetch(client, key, semaphore) for key in missing])
+
+        # Failed lookups are not cached so they are retried next time
+        to_save = {key: url for key, (url, ok) in zip(missing, fetched) if ok}
+        for key, (url, _) in zip(missing, fetched):
+            found[key] = url
+        for key, url in to_save.items():
+            _memory.set(key, (url,))
+
+        if to_save:
+            try:
+                await asyncio.to_thread(_save, to_save)
+            except Exception as e:
+                print(f"⚠️ Food image cache write failed: {e}")
+
+    return [found.get(key) for key in keys]
+
+
+def stats() -> dict:
+    return _memory.stats()
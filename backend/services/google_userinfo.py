@@ -0,0 +1,58 @@
+import hashlib
+import os
+
+import httpx
+
+from .cache import LRUCache
+from .http_client import get_http_client
+
+GOOGLE_USERINFO_URL = "https://www.googleapis.com/oauth2/v3/userinfo"
+GOOGLE_USERINFO_TIMEOUT = float(os.getenv("GOOGLE_USERINFO_TIMEOUT", "5"))
+# Short on purpose: a revoked token keeps working for at most this long
+GOOGLE_USERINFO_TTL = float(os.getenv("GOOGLE_USERINFO_TTL", "300"))
+
+# Keyed by a hash of the access token so raw tokens are never kept in memory
+_userinfo_cache = LRUCache(maxsize=1000, ttl=GOOGLE_USERINFO_TTL)
+
+
+class GoogleUnavailable(RuntimeError):
+    """Google did not answer in time."""
+
+
+def _key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+async def fetch_userinfo(access_token: str) -> dict | None:
+    """
+    Google userinfo for an OAuth access token, or None if Google rejects the token.
+    Successful lookups are cached for GOOGLE_USERINFO_TTL seconds.
+    """
+    key = _key(access_token)
+    cached = _userinfo_cache.get(key)
+    if cached is not None:
+        return cached
+
+    client = get_http_client()
+    try:
+        res = await client.get(
+            GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=GOOGLE_USERINFO_TIMEOUT,
+        )
+    except httpx.HTTPError as e:
+        raise GoogleUnavailable(str(e)) from e
+
+    if res.status_code >= 500:
+        raise GoogleUnavailable(f"HTTP {res.status_code}")
+    if res.status_code != 200:
+        return None
+
+    info = res.json()
+    if info.get("email"):
+        _userinfo_cache.set(key, info)
+    return info
+
+
+def stats() -> dict:
+    return _userinfo_cache.stats()
@@ -0,0 +1,164 @@
+import os
+
+import httpx
+
+# HTTP/2 needs the optional "h2" package (httpx[http2]); fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "20"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_PER_HOST_CONNECTIONS = int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "20"))
+
+# Upstreams that get their own connection pool (and therefore their own limits)
+UPSTREAM_HOSTS = [
+    "router.huggingface.co",
+    "api.spoonacular.com",
+    "api-free.deepl.com",
+    "www.googleapis.com",
+]
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        HTTP_READ_TIMEOUT,
+        connect=HTTP_CONNECT_TIMEOUT,
+        pool=HTTP_CONNECT_TIMEOUT,
+    )
+
+
+def _transport(max_connections: int) -> httpx.AsyncHTTPTransport:
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(HTTP_MAX_KEEPALIVE, max_connections),
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncHTTPTransport(limits=limits, http2=HTTP2_AVAILABLE, retries=1)
+
+
+class _ReleaseOnClose(httpx.AsyncByteStream):
+    """Response body stream that calls `release` once when it is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        release, self.release = self.release, None
+        try:
+            await self.stream.aclose()
+        finally:
+            if release:
+                release()
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """
+    Counts requests per host around the wrapped transport. A request stays in
+    flight until its response body is closed, or until sending it fails.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, pool: "HTTPClientPool"):
+        self.transport = transport
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.pool._started(host)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            self.pool._finished(host)
+            raise
+        if response.is_closed:
+            # Body already in memory (e.g. a mock transport): nothing left to wait for
+            self.pool._finished(host)
+        else:
+            response.stream = _ReleaseOnClose(response.stream, lambda: self.pool._finished(host))
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class HTTPClientPool:
+    """
+    One application-scoped httpx.AsyncClient shared by every upstream caller.
+    Each known upstream host is mounted on its own transport so a slow host
+    cannot exhaust connections needed by the others.
+    """
+
+    def __init__(self):
+        self.client: httpx.AsyncClient | None = None
+        self._transports: dict[str, httpx.AsyncHTTPTransport] = {}
+        self._requests: dict[str, int] = {}
+        self._in_flight: dict[str, int] = {}
+
+    def _started(self, host: str):
+        self._requests[host] = self._requests.get(host, 0) + 1
+        self._in_flight[host] = self._in_flight.get(host, 0) + 1
+
+    def _finished(self, host: str):
+        self._in_flight[host] = max(self._in_flight.get(host, 1) - 1, 0)
+
+    def start(self) -> httpx.AsyncClient:
+        if self.client is not None and not self.client.is_closed:
+            return self.client
+
+        self._transports = {
+            host: _transport(HTTP_PER_HOST_CONNECTIONS) for host in UPSTREAM_HOSTS
+        }
+        self._transports["default"] = _transport(HTTP_MAX_CONNECTIONS)
+
+        self.client = httpx.AsyncClient(
+            timeout=_timeout(),
+            transport=_CountingTransport(self._transports["default"], self),
+            mounts={
+                f"all://{host}": _CountingTransport(t, self)
+                for host, t in self._transports.items() if host != "default"
+            },
+        )
+        print(f"🌐 Shared HTTP client started (http2={HTTP2_AVAILABLE})")
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def stats(self) -> dict:
+        pools = {}
+        for host, transport in self._transports.items():
+            connections = getattr(transport._pool, "connections", [])
+            idle = sum(1 for c in connections if c.is_idle())
+            pools[host] = {
+                "connections": len(connections),
+                "idle": idle,
+                "active": len(connections) - idle,
+            }
+
+        return {
+            "started": self.client is not None and not self.client.is_closed,
+            "http2": HTTP2_AVAILABLE,
+            "requests_by_host": dict(self._requests),
+            "in_flight_by_host": dict(self._in_flight),
+            "pools": pools,
+        }
+
+
+http_pool = HTTPClientPool()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, starting it lazily if the lifespan hook has not run."""
+    return http_pool.start()
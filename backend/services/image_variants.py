@@ -0,0 +1,162 @@
+import asyncio
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from .image_pipeline import IMAGE_EXECUTOR, ImagePipeline, PipelineSaturated
+from .singleflight import SingleFlight
+
+UPLOAD_ROOT = Path("backend/uploads")
+# Derivatives are a disposable cache, kept outside the uploads folder
+IMAGE_VARIANT_DIR = Path(os.getenv("IMAGE_VARIANT_DIR", "backend/cache/variants"))
+
+# Longest edge in pixels
+VARIANT_SIZES = {
+    "thumb": 128,
+    "small": 320,
+    "medium": 720,
+}
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+DEFAULT_VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = int(os.getenv("IMAGE_VARIANT_QUALITY", "80"))
+
+# Own pool and queue limit, so a page full of thumbnails cannot starve /predict
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", "2"))
+IMAGE_VARIANT_MAX_PENDING = int(os.getenv("IMAGE_VARIANT_MAX_PENDING", str(IMAGE_VARIANT_WORKERS * 32)))
+
+variant_pipeline = ImagePipeline(IMAGE_EXECUTOR, IMAGE_VARIANT_WORKERS, IMAGE_VARIANT_MAX_PENDING)
+
+_variant_flight = SingleFlight("image_variants")
+_background_tasks: set[asyncio.Task] = set()
+# Requests answered with the original upload because the variant queue was full
+served_original = 0
+
+
+class VariantNotFound(Exception):
+    """Unknown size / format, or no such uploaded image."""
+
+
+# =====================
+# Worker function (module-level so it can be pickled)
+# =====================
+
+def render_variant(source: str, dest: str, max_edge: int, pil_format: str) -> str:
+    image = Image.open(source)
+    if image.format == "JPEG":
+        image.draft("RGB", (max_edge, max_edge))
+    image = ImageOps.exif_transpose(image)
+
+    keep_alpha = pil_format == "WEBP" and image.mode in ("RGBA", "LA", "P")
+    image = image.convert("RGBA" if keep_alpha else "RGB")
+    image.thumbnail((max_edge, max_edge))
+
+    tmp = f"{dest}.{os.getpid()}.part"
+    image.save(tmp, format=pil_format, quality=VARIANT_QUALITY)
+    os.replace(tmp, dest)
+    return dest
+
+
+# =====================
+# Paths / URLs
+# =====================
+
+def _relative_upload_path(image_url: str | None) -> str | None:
+    """'/uploads/profiles/a.jpg' -> 'profiles/a.jpg'; None for external URLs."""
+    if not image_url or not image_url.startswith("/uploads/"):
+        return None
+    return image_url[len("/uploads/"):]
+
+
+def source_path(rel_path: str) -> Path:
+    root = UPLOAD_ROOT.resolve()
+    path = (root / rel_path).resolve()
+    if root not in path.parents or not path.is_file():
+        raise VariantNotFound(rel_path)
+    return path
+
+
+def variant_path(rel_path: str, size: str, fmt: str) -> Path:
+    return IMAGE_VARIANT_DIR / size / f"{Path(rel_path).with_suffix('')}.{fmt}"
+
+
+def variant_urls(image_url: str | None) -> dict[str, str] | None:
+    """{size: url} for an uploaded image; None for anything not served from /uploads."""
+    rel_path = _relative_upload_path(image_url)
+    if rel_path is None:
+        return None
+    return {size: f"/variants/{size}/{rel_path}" for size in VARIANT_SIZES}
+
+
+# =====================
+# Generation
+# =====================
+
+async def ensure_variant(rel_path: str, size: str, fmt: str = DEFAULT_VARIANT_FORMAT) -> Path:
+    """
+    Path of a rendered variant, generating it on first use.
+    Cached files are reused until the source image is newer.
+    """
+    if size not in VARIANT_SIZES or fmt not in VARIANT_FORMATS:
+        raise VariantNotFound(f"{size}/{fmt}")
+
+    source = source_path(rel_path)
+    dest = variant_path(rel_path, size, fmt)
+    if dest.exists() and dest.stat().st_mtime >= source.stat().st_mtime:
+        return dest
+
+    async def _render():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        pil_format = VARIANT_FORMATS[fmt][0]
+        await variant_pipeline.run(render_variant, str(source), str(dest), VARIANT_SIZES[size], pil_format)
+        return dest
+
+    return await _variant_flight.do(str(dest), _render)
+
+
+async def variant_or_original(rel_path: str, size: str, fmt: str = DEFAULT_VARIANT_FORMAT) -> tuple[Path, bool]:
+    """
+    (path, is_variant). When the variant queue is full the original upload is
+    returned instead, so clients get a bigger image rather than a 503.
+    """
+    global served_original
+    try:
+        return await ensure_variant(rel_path, size, fmt), True
+    except PipelineSaturated:
+        served_original += 1
+        return source_path(rel_path), False
+
+
+async def _generate_all(rel_path: str):
+    for size in VARIANT_SIZES:
+        try:
+            await ensure_variant(rel_path, size)
+        except Exception as e:
+            # The lazy route retries on first request
+            print(f"⚠️ Variant {size} for {rel_path} failed: {e}")
+
+
+def schedule_variants(image_url: str):
+    """Render the default-format variants of a new upload in the background."""
+    rel_path = _relative_upload_path(image_url)
+    if rel_path is None:
+        return
+    task = asyncio.create_task(_generate_all(rel_path))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+def delete_variants(image_url: str | None):
+    rel_path = _relative_upload_path(image_url)
+    if rel_path is None:
+        return
+    for size in VARIANT_SIZES:
+        for fmt in VARIANT_FORMATS:
+            variant_path(rel_path, size, fmt).unlink(missing_ok=True)
+
+
+def stats() -> dict:
+    return {**_variant_flight.stats(), "pipeline": variant_pipeline.stats(), "served_original": served_original}
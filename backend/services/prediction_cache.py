@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from .cache import LRUCache
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "512"))
+# Disk tier is optional: only enabled when a directory is configured
+PREDICTION_CACHE_DIR = os.getenv("PREDICTION_CACHE_DIR")
+PREDICTION_CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", str(7 * 24 * 3600)))
+
+# dHash bits (hash_size²) and coarse colour grid (cells per side) of the cache key
+FINGERPRINT_HASH_SIZE = 16
+FINGERPRINT_COLOR_GRID = 4
+# Hashes with fewer set (or unset) bits than this fraction carry too little
+# structure to tell dishes apart (flat colours, smooth gradients): never cached
+FINGERPRINT_MIN_BIT_FRACTION = 0.05
+
+
+def image_dhash(image: Image.Image, hash_size: int = 8) -> str:
+    """
+    Difference hash of an image as a hex string.
+    Re-encoded or slightly resized copies of the same photo map to the same hash.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+
+    bits = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def _color_grid(image: Image.Image, grid: int = FINGERPRINT_COLOR_GRID) -> str:
+    """Mean RGB of grid × grid cells, 8 levels per channel, as a hex string."""
+    small = image.convert("RGB").resize((grid, grid), Image.BOX)
+    return "".join(f"{r >> 5}{g >> 5}{b >> 5}" for r, g, b in small.getdata())
+
+
+def image_fingerprint(image: Image.Image) -> str | None:
+    """
+    Prediction cache key for an image: a 256-bit dHash (structure) plus a
+    coarse colour grid, so flat or differently coloured dishes don't collide.
+    None when the image is too featureless to be cached safely.
+    """
+    dhash = image_dhash(image, FINGERPRINT_HASH_SIZE)
+    total = FINGERPRINT_HASH_SIZE * FINGERPRINT_HASH_SIZE
+    ones = bin(int(dhash, 16)).count("1")
+    if min(ones, total - ones) < total * FINGERPRINT_MIN_BIT_FRACTION:
+        return None
+    return f"{dhash}-{_color_grid(image)}"
+
+
+class PredictionCache:
+    """
+    /predict response cache keyed by (image fingerprint, lang).
+    Tier 1 is a process-local LRU, tier 2 an optional JSON-per-entry directory with TTL.
+    """
+
+    def __init__(self, maxsize: int, directory: str | None = None, ttl: int = PREDICTION_CACHE_TTL):
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._writes = 0
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_hash: str, lang: str) -> str:
+        return f"{lang.lower()}:{image_hash}"
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def _read_disk(self, key: str):
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            with path.open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: dict):
+        path = self._path(key)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+        # Sweep expired entries every so often so the directory stays bounded by TTL
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.evict_expired()
+
+    def evict_expired(self) -> int:
+        if not self.directory:
+            return 0
+
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    async def get(self, key: str):
+        value = self.memory.get(key)
+        if value is not None or not self.directory:
+            return value
+
+        value = await asyncio.to_thread(self._read_disk, key)
+        if value is None:
+            self.disk_misses += 1
+            return None
+
+        self.disk_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self.memory.set(key, value)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write_disk, key, value)
+            except OSError as e:
+                print(f"⚠️ Prediction cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "disk": {
+                "enabled": self.directory is not None,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+            },
+        }
+
+
+prediction_cache = PredictionCache(
+    maxsize=PREDICTION_CACHE_SIZE,
+    directory=PREDICTION_CACHE_DIR,
+    ttl=PREDICTION_CACHE_TTL,
+)
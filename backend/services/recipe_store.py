@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+import httpx
+
+from .. import models
+from ..database import SessionLocal
+from .resilience import spoonacular
+from .singleflight import recipe_flight
+
+SPOONACULAR_API_KEY = os.getenv("SPOONACULAR_API_KEY")
+
+# Recipes older than this are still served, but refreshed in the background
+RECIPE_STALE_SECONDS = int(os.getenv("RECIPE_STALE_SECONDS", str(7 * 24 * 3600)))
+
+_refreshing: set[int] = set()
+_background_tasks: set[asyncio.Task] = set()
+
+
+def normalize_recipe(info: dict) -> dict:
+    """Keep only the fields the app uses from a Spoonacular /information payload."""
+    return {
+        "id": info.get("id"),
+        "title": info.get("title", ""),
+        "image": info.get("image"),
+        "instructions": info.get("instructions"),
+        "sourceUrl": info.get("sourceUrl"),
+        "ingredients": [
+            {
+                "name": ing.get("name"),
+                "amount": ing.get("amount", ""),
+                "unit": ing.get("unit", ""),
+            }
+            for ing in info.get("extendedIngredients", [])
+        ],
+    }
+
+
+def build_recipe_response(recipe: dict, instructions_en: str, t_title: str, t_instr: str, t_ingreds: list[str]) -> dict:
+    """Shape a stored recipe into the `recipe` object returned to the app."""
+    return {
+        "name_en": recipe["title"],
+        "name_jp": t_title,
+        "image": recipe["image"],
+        "instructions_en": instructions_en,
+        "instructions_jp": t_instr,
+        "ingredients_en": [
+            {
+                "ingredient": ing["name"],
+                "measure": f"{ing['amount']} {ing['unit']}".strip()
+            }
+            for ing in recipe["ingredients"]
+        ],
+        "ingredients_jp": t_ingreds,
+        "sourceUrl": recipe["sourceUrl"],
+    }
+
+
+# =====================
+# DB access (sync, run in a worker thread)
+# =====================
+
+def _load(recipe_id: int):
+    db = SessionLocal()
+    try:
+        row = db.get(models.Recipe, recipe_id)
+        if not row:
+            return None
+        return json.loads(row.payload), row.fetched_at
+    finally:
+        db.close()
+
+
+def _save(recipe_id: int, recipe: dict):
+    db = SessionLocal()
+    try:
+        db.merge(models.Recipe(
+            id=recipe_id,
+            title=recipe["title"],
+            image=recipe["image"],
+            source_url=recipe["sourceUrl"],
+            payload=json.dumps(recipe, ensure_ascii=False),
+            fetched_at=datetime.now(timezone.utc),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _find_by_title(query: str):
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(models.Recipe.id)
+            .filter(models.Recipe.title.ilike(f"%{query}%"))
+            .order_by(models.Recipe.fetched_at.desc())
+            .first()
+        )
+        return row[0] if row else None
+    finally:
+        db.close()
+
+
+async def find_stored_recipe_id(query: str) -> int | None:
+    """Best-effort local match by title, used when Spoonacular search is unavailable."""
+    try:
+        return await asyncio.to_thread(_find_by_title, " ".join(query.split()))
+    except Exception as e:
+        print(f"⚠️ Recipe store search failed: {e}")
+        return None
+
+
+def _is_stale(fetched_at: datetime) -> bool:
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    age = datetime.now(timezone.utc) - fetched_at
+    return age.total_seconds() > RECIPE_STALE_SECONDS
+
+
+# =====================
+# Upstream
+# =====================
+
+async def fetch_recipe(client: httpx.AsyncClient, recipe_id: int) -> tuple[dict, bool]:
+    """Fetch /information from Spoonacular. Returns (recipe, ok) — failed payloads are not persisted."""
+    info_url = (
+        f"https://api.spoonacular.com/recipes/{recipe_id}/information"
+        f"?apiKey={SPOONACULAR_API_KEY}"
+    )
+    info_res = await spoonacular.request(client, "GET", info_url, hedge=True)
+    info = info_res.json()
+    return normalize_recipe(info), info_res.status_code == 200 and bool(info.get("id"))
+
+
+async def _refresh(client: httpx.AsyncClient, recipe_id: int):
+    try:
+        recipe, ok = await fetch_recipe(client, recipe_id)
+        if ok:
+            await asyncio.to_thread(_save, recipe_id, recipe)
+            print(f"🔄 Refreshed stored recipe {recipe_id}")
+    except Exception as e:
+        print(f"⚠️ Recipe refresh failed ({recipe_id}): {e}")
+    finally:
+        _refreshing.discard(recipe_id)
+
+
+def _schedule_refresh(client: httpx.AsyncClient, recipe_id: int):
+    if recipe_id in _refreshing:
+        return
+    _refreshing.add(recipe_id)
+    task = asyncio.create_task(_refresh(client, recipe_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def get_recipe(client: httpx.AsyncClient, recipe_id: int) -> dict:
+    """
+    Return the normalized recipe for a Spoonacular id.
+    Served from the local store when present; stale rows trigger a background refresh.
+    Concurrent requests for the same id share one lookup.
+    """
+    return await recipe_flight.do(f"recipe:{recipe_id}", lambda: _get_recipe(client, recipe_id))
+
+
+async def _get_recipe(client: httpx.AsyncClient, recipe_id: int) -> dict:
+    try:
+        stored = await asyncio.to_thread(_load, recipe_id)
+    except Exception as e:
+        print(f"⚠️ Recipe store read failed: {e}")
+        stored = None
+
+    if stored:
+        recipe, fetched_at = stored
+        if _is_stale(fetched_at):
+            _schedule_refresh(client, recipe_id)
+        return recipe
+
+    recipe, ok = await fetch_recipe(client, recipe_id)
+    if ok:
+        try:
+            await asyncio.to_thread(_save, recipe_id, recipe)
+        except Exception as e:
+            print(f"⚠️ Recipe store write failed: {e}")
+    return recipe
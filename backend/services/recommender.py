@@ -0,0 +1,247 @@
+"""
+Item-similarity recommender that fills the recommendations table.
+
+Signals (user × food/dish matrix, names lowercased):
+    favorite food           1.0
+    liked community post    0.5  (the post's dish)
+    own community post      0.5
+
+Item-item cosine similarity S = Xnᵀ·Xn is computed once with NumPy; a user's
+scores are X[u]·S with already-known items masked out. Each recommendation
+keeps the seed item that contributed most as its `reason`.
+
+Only users whose top-K list changed are rewritten, in small transactions.
+
+    python -m backend.services.recommender
+"""
+import asyncio
+import os
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+
+RECOMMENDER_TOP_K = int(os.getenv("RECOMMENDER_TOP_K", "10"))
+# Most popular items kept in the similarity matrix (items × items floats)
+RECOMMENDER_MAX_ITEMS = int(os.getenv("RECOMMENDER_MAX_ITEMS", "2000"))
+# Users scored / written per step
+RECOMMENDER_BATCH_USERS = int(os.getenv("RECOMMENDER_BATCH_USERS", "500"))
+# How often the periodic job runs (0 disables it)
+RECOMMENDER_REFRESH_SECONDS = int(os.getenv("RECOMMENDER_REFRESH_SECONDS", str(6 * 3600)))
+
+FAVORITE_WEIGHT = 1.0
+LIKE_WEIGHT = 0.5
+POST_WEIGHT = 0.5
+
+last_run: dict = {}
+
+
+def _norm(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+# =====================
+# Build
+# =====================
+
+def load_interactions(db: Session) -> list[tuple[int, str, float]]:
+    favorites = db.query(models.UserFavoriteFood.user_id, models.UserFavoriteFood.food_name).all()
+    likes = (
+        db.query(models.PostLike.user_id, models.CommunityPost.dish_name)
+        .join(models.CommunityPost, models.CommunityPost.id == models.PostLike.post_id)
+        .all()
+    )
+    posts = db.query(models.CommunityPost.user_id, models.CommunityPost.dish_name).all()
+
+    return (
+        [(u, name, FAVORITE_WEIGHT) for u, name in favorites]
+        + [(u, name, LIKE_WEIGHT) for u, name in likes]
+        + [(u, name, POST_WEIGHT) for u, name in posts]
+    )
+
+
+def build_matrix(interactions: list[tuple[int, str, float]]):
+    """Returns (user_ids, item_names, X) with X[user, item] = summed signal weight."""
+    interactions = [(u, _norm(name), w) for u, name, w in interactions if name and name.strip()]
+    if not interactions:
+        return [], [], np.zeros((0, 0), dtype=np.float32)
+
+    # Keep the most popular items so S stays items × items sized
+    popularity: dict[str, set] = {}
+    for u, name, _ in interactions:
+        popularity.setdefault(name, set()).add(u)
+    items = sorted(popularity, key=lambda n: (-len(popularity[n]), n))[:RECOMMENDER_MAX_ITEMS]
+    item_index = {name: i for i, name in enumerate(items)}
+
+    user_ids = sorted({u for u, _, _ in interactions})
+    user_index = {u: i for i, u in enumerate(user_ids)}
+
+    rows, cols, weights = [], [], []
+    for u, name, w in interactions:
+        j = item_index.get(name)
+        if j is not None:
+            rows.append(user_index[u])
+            cols.append(j)
+            weights.append(w)
+
+    X = np.zeros((len(user_ids), len(items)), dtype=np.float32)
+    np.add.at(X, (np.array(rows), np.array(cols)), np.array(weights, dtype=np.float32))
+    return user_ids, items, X
+
+
+def item_similarity(X: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(X, axis=0)
+    Xn = X / np.where(norms == 0, 1, norms)
+    S = Xn.T @ Xn
+    np.fill_diagonal(S, 0)
+    return S
+
+
+def recommend(user_ids: list[int], items: list[str], X: np.ndarray, k: int = RECOMMENDER_TOP_K) -> dict[int, list[tuple[str, str]]]:
+    """{user_id: [(item, seed_item), ...]} best first. Users with no scored items are omitted."""
+    if X.size == 0:
+        return {}
+
+    S = item_similarity(X)
+    k = min(k, len(items))
+    out = {}
+
+    for start in range(0, len(user_ids), RECOMMENDER_BATCH_USERS):
+        block = X[start:start + RECOMMENDER_BATCH_USERS]
+        scores = block @ S
+        scores[block > 0] = 0  # never recommend what the user already has
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for r in range(block.shape[0]):
+            picks = top[r][top_scores[r] > 0]
+            if not picks.size:
+                continue
+            # Seed item with the largest contribution X[u, i] * S[i, j]
+            seeds = np.argmax(block[r][:, None] * S[:, picks], axis=0)
+            out[user_ids[start + r]] = [(items[j], items[s]) for j, s in zip(picks, seeds)]
+
+    return out
+
+
+# =====================
+# Write (incremental)
+# =====================
+
+def _images(db: Session, names: set[str]) -> dict[str, str]:
+    images = {}
+    for food_name, url in (
+        db.query(models.FoodImage.food_name, models.FoodImage.image_url)
+        .filter(models.FoodImage.food_name.in_(names))
+    ):
+        if url:
+            images[food_name] = url
+    # Community photos win over stock images
+    for dish_name, image in db.query(models.DishTrend.dish_name, models.DishTrend.image):
+        key = _norm(dish_name)
+        if key in names and image:
+            images[key] = image
+    return images
+
+
+def write_recommendations(db: Session, recs: dict[int, list[tuple[str, str]]]) -> int:
+    """Replace rows only for users whose list changed. Returns the number of users rewritten."""
+    names = {name for rows in recs.values() for name, _ in rows}
+    images = _images(db, names) if names else {}
+
+    existing_users = {u for (u,) in db.query(models.Recommendations.user_id).distinct()}
+    user_ids = sorted(set(recs) | existing_users)
+    changed = 0
+
+    for start in range(0, len(user_ids), RECOMMENDER_BATCH_USERS):
+        chunk = user_ids[start:start + RECOMMENDER_BATCH_USERS]
+
+        current: dict[int, list] = {}
+        for row in (
+            db.query(models.Recommendations)
+            .filter(models.Recommendations.user_id.in_(chunk))
+            .order_by(models.Recommendations.user_id, models.Recommendations.id)
+        ):
+            current.setdefault(row.user_id, []).append((row.recipe_name, row.image_url, row.reason))
+
+        for user_id in chunk:
+            wanted = [
+                (name, images.get(name), f"Because you like {seed}")
+                for name, seed in recs.get(user_id, [])
+            ]
+            if current.get(user_id, []) == wanted:
+                continue
+
+            db.query(models.Recommendations).filter(
+                models.Recommendations.user_id == user_id
+            ).delete(synchronize_session=False)
+            # Inserted best first, so reads order by id
+            db.add_all([
+                models.Recommendations(user_id=user_id, recipe_name=name, image_url=image, reason=reason)
+                for name, image, reason in wanted
+            ])
+            changed += 1
+
+        db.commit()
+
+    return changed
+
+
+def run(db: Session) -> dict:
+    started = time.perf_counter()
+    user_ids, items, X = build_matrix(load_interactions(db))
+    recs = recommend(user_ids, items, X)
+    changed = write_recommendations(db, recs)
+
+    last_run.update({
+        "users": len(user_ids),
+        "items": len(items),
+        "users_with_recommendations": len(recs),
+        "users_rewritten": changed,
+        "seconds": round(time.perf_counter() - started, 3),
+        "finished_at": time.time(),
+    })
+    return dict(last_run)
+
+
+def get_recommendations(db: Session, user_id: int) -> list[models.Recommendations]:
+    return (
+        db.query(models.Recommendations)
+        .filter(models.Recommendations.user_id == user_id)
+        .order_by(models.Recommendations.id)
+        .all()
+    )
+
+
+# =====================
+# Periodic job
+# =====================
+
+def _run_job() -> dict:
+    db = SessionLocal()
+    try:
+        return run(db)
+    finally:
+        db.close()
+
+
+async def refresh_loop():
+    """Recompute at startup, then every RECOMMENDER_REFRESH_SECONDS."""
+    while True:
+        try:
+            result = await asyncio.to_thread(_run_job)
+            print(f"🍱 Recommendations refreshed ({result['users_rewritten']} users updated)")
+        except Exception as e:
+            print(f"⚠️ Recommendation refresh failed: {e}")
+        await asyncio.sleep(RECOMMENDER_REFRESH_SECONDS)
+
+
+if __name__ == "__main__":
+    print(f"✅ {_run_job()}")
@@ -0,0 +1,246 @@
+"""
+Upstream call policy shared by the Spoonacular, DeepL and HuggingFace callers.
+
+Each upstream gets an `Upstream` with
+    - a circuit breaker: after N consecutive failures calls fail fast for a
+      cool-down period, then one probe call decides whether to close it again
+    - a retry budget: retries (and hedges) are only allowed while they stay
+      below a fraction of normal traffic, so retries cannot amplify an outage
+    - jittered exponential backoff between retries
+    - optional hedging for idempotent GETs: if the first attempt has not
+      answered after `hedge_after_ms`, a second one is started and the first
+      response wins. Hedges spend retry-budget tokens, and they are off unless
+      configured: on a metered API every hedge is a second billed call
+
+Callers catch `UpstreamUnavailable` and serve their fallback (stored recipe,
+untranslated text, ...).
+"""
+import asyncio
+import os
+import random
+import time
+
+import httpx
+
+UPSTREAM_FAILURE_THRESHOLD = int(os.getenv("UPSTREAM_FAILURE_THRESHOLD", "5"))
+UPSTREAM_RESET_SECONDS = float(os.getenv("UPSTREAM_RESET_SECONDS", "30"))
+UPSTREAM_RETRY_RATIO = float(os.getenv("UPSTREAM_RETRY_RATIO", "0.2"))
+UPSTREAM_RETRY_BURST = float(os.getenv("UPSTREAM_RETRY_BURST", "10"))
+UPSTREAM_BACKOFF_MS = float(os.getenv("UPSTREAM_BACKOFF_MS", "100"))
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The upstream failed (or its circuit is open) and no retry is left."""
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+# =====================
+# Circuit breaker
+# =====================
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN and not self._probing:
+            # Exactly one probe call while half-open
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release_probe(self):
+        """The probe ended without a verdict (cancelled, unexpected error): let the next call probe."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opens += 1
+                print(f"🔌 Circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "opens": self.opens}
+
+
+# =====================
+# Retry budget
+# =====================
+
+class RetryBudget:
+    """Token bucket: every call deposits `ratio` tokens, every retry or hedge spends one."""
+
+    def __init__(self, ratio: float, burst: float):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        return False
+
+
+# =====================
+# Upstream
+# =====================
+
+class Upstream:
+    def __init__(self, name: str, timeout: float, max_retries: int = 1, hedge_after_ms: float = 0):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_after = hedge_after_ms / 1000
+        self.breaker = CircuitBreaker(UPSTREAM_FAILURE_THRESHOLD, UPSTREAM_RESET_SECONDS)
+        self.budget = RetryBudget(UPSTREAM_RETRY_RATIO, UPSTREAM_RETRY_BURST)
+
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.short_circuited = 0
+
+    async def _attempt(self, send) -> httpx.Response:
+        response = await send()
+        # 5xx and 429 are worth retrying; other statuses belong to the caller
+        if response.status_code >= 500 or response.status_code == 429:
+            raise _RetryableStatus(response)
+        return response
+
+    async def _hedged(self, send) -> httpx.Response:
+        first = asyncio.create_task(self._attempt(send))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done or not self.budget.withdraw():
+            return await first
+
+        self.hedges += 1
+        second = asyncio.create_task(self._attempt(send))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, hedge: bool = False, **kwargs) -> httpx.Response:
+        """
+        Send one request under this upstream's policy.
+        Set `hedge=True` only for idempotent requests.
+        Raises UpstreamUnavailable when the circuit is open or every attempt failed.
+        """
+        if not self.breaker.allow():
+            self.short_circuited += 1
+            raise UpstreamUnavailable(f"{self.name} circuit open")
+        is_probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+
+        self.calls += 1
+        self.budget.deposit()
+        kwargs.setdefault("timeout", self.timeout)
+
+        def send():
+            return client.request(method, url, **kwargs)
+
+        attempt = 0
+        while True:
+            try:
+                if hedge and self.hedge_after > 0:
+                    response = await self._hedged(send)
+                else:
+                    response = await self._attempt(send)
+                self.breaker.record_success()
+                return response
+            except (httpx.TransportError, _RetryableStatus) as e:
+                self.failures += 1
+                self.breaker.record_failure()
+                if attempt >= self.max_retries or not self.breaker.allow() or not self.budget.withdraw():
+                    raise UpstreamUnavailable(f"{self.name}: {e!r}") from e
+            except BaseException:
+                # Cancellation or an unexpected error says nothing about upstream health,
+                # but a half-open probe must not stay claimed forever
+                if is_probe:
+                    self.breaker.release_probe()
+                raise
+
+            attempt += 1
+            self.retries += 1
+            # Full jitter: sleep anywhere in [0, base * 2^attempt)
+            await asyncio.sleep(random.uniform(0, UPSTREAM_BACKOFF_MS * 2 ** attempt / 1000))
+
+    def stats(self) -> dict:
+        return {
+            "timeout_s": self.timeout,
+            "circuit": self.breaker.stats(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "short_circuited": self.short_circuited,
+            "retry_budget_exhausted": self.budget.exhausted,
+        }
+
+
+spoonacular = Upstream(
+    "spoonacular",
+    timeout=float(os.getenv("SPOONACULAR_TIMEOUT", "6")),
+    max_retries=1,
+    # Spoonacular bills per call and its quota is the scaling limit: opt in, e.g. 1500
+    hedge_after_ms=float(os.getenv("SPOONACULAR_HEDGE_MS", "0")),
+)
+deepl = Upstream(
+    "deepl",
+    timeout=float(os.getenv("DEEPL_TIMEOUT", "5")),
+    max_retries=1,
+)
+huggingface = Upstream(
+    "huggingface",
+    timeout=float(os.getenv("HUGGINGFACE_TIMEOUT", "30")),
+    max_retries=1,
+)
+
+upstreams = [spoonacular, deepl, huggingface]
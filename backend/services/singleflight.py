@@ -0,0 +1,57 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call for `key` is in flight,
+    later callers await the same result instead of starting their own.
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        """Run `fn()` (a coroutine factory) once per key across concurrent callers."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            self.calls += 1
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shield: one caller being cancelled must not cancel the shared call
+        return await asyncio.shield(future)
+
+    def join(self, key) -> tuple[asyncio.Future, bool]:
+        """
+        Lower-level form for callers that resolve many keys in one request.
+        Returns (future, is_leader); the leader must call finish(key, result).
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+            return future, False
+
+        self.calls += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        return future, True
+
+    def finish(self, key, result):
+        future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "calls": self.calls, "shared": self.shared}
+
+
+search_flight = SingleFlight("spoonacular_search")
+recipe_flight = SingleFlight("spoonacular_recipe")
+translation_flight = SingleFlight("deepl_translation")
@@ -2,6 +2,9 @@ import os
 import requests
 from dotenv import load_dotenv
 
+from .resilience import UpstreamUnavailable, spoonacular
+from .singleflight import search_flight
+
 load_dotenv()
 API_KEY = os.getenv("SPOONACULAR_API_KEY")
 
@@ -20,3 +23,25 @@ def search_recipes(food_name):
     params = {"apiKey": API_KEY, "query": food_name, "number": 5}
     response = requests.get(url, params=params)
     return response.json()
+
+async def search_recipe_id(client, query):
+    """
+    Id of the best recipe match for `query` (None if no result). Identical concurrent searches share one request.
+    Raises UpstreamUnavailable when Spoonacular is failing or refuses the
+    search (e.g. 402 when the daily quota is used up), so callers never mistake
+    an error for "no results".
+    """
+    normalized = " ".join(query.lower().split())
+
+    async def _search():
+        url = f"{BASE_URL}/recipes/complexSearch"
+        params = {"query": normalized, "number": 1, "apiKey": API_KEY}
+        r = await spoonacular.request(client, "GET", url, hedge=True, params=params)
+        if r.status_code != 200:
+            raise UpstreamUnavailable(f"spoonacular search: HTTP {r.status_code}")
+        d = r.json()
+        if d.get("results"):
+            return d["results"][0]["id"]
+        return None
+
+    return await search_flight.do(f"search:{normalized}", _search)
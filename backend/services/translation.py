@@ -0,0 +1,296 @@
+import asyncio
+import hashlib
+import os
+import time
+
+import httpx
+
+from .. import models
+from ..database import SessionLocal
+from .cache import LRUCache
+from .resilience import deepl
+from .singleflight import translation_flight
+
+DEEPL_API_KEY = os.getenv("DEEPL_API_KEY")
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+
+
+# =====================
+# Translation memory (LRU → DB)
+# =====================
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Two-tier cache of DeepL results keyed by (source text hash, target_lang).
+    Tier 1 is a process-local LRU, tier 2 the translation_memory table.
+    """
+
+    def __init__(self, maxsize: int):
+        self.memory = LRUCache(maxsize=maxsize)
+        self.db_hits = 0
+        self.db_misses = 0
+
+    def _load(self, hashes: list[str], target_lang: str) -> dict[str, str]:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(models.TranslationMemory.source_hash, models.TranslationMemory.translated_text)
+                .filter(
+                    models.TranslationMemory.target_lang == target_lang,
+                    models.TranslationMemory.source_hash.in_(hashes)
+                )
+                .all()
+            )
+            return {h: t for h, t in rows}
+        finally:
+            db.close()
+
+    def _save(self, pairs: list[tuple[str, str]], target_lang: str):
+        """One multi-row upsert for the whole batch (was one SELECT + INSERT per text)."""
+        rows = {
+            _hash(source): {
+                "source_hash": _hash(source),
+                "target_lang": target_lang,
+                "source_text": source,
+                "translated_text": translated,
+            }
+            for source, translated in pairs
+        }
+        table = models.TranslationMemory.__table__
+        db = SessionLocal()
+        try:
+            if db.bind.dialect.name == "mysql":
+                from sqlalchemy.dialects.mysql import insert
+
+                stmt = insert(table).values(list(rows.values()))
+                db.execute(stmt.on_duplicate_key_update(translated_text=stmt.inserted.translated_text))
+            else:
+                # No portable upsert: replace the rows of this batch
+                db.execute(table.delete().where(
+                    table.c.target_lang == target_lang,
+                    table.c.source_hash.in_(list(rows)),
+                ))
+                db.execute(table.insert().values(list(rows.values())))
+            db.commit()
+        finally:
+            db.close()
+
+    async def lookup(self, texts: list[str], target_lang: str) -> dict[str, str]:
+        """Return {source: translation} for every text already in memory."""
+        found = {}
+        missing = {}
+        for text in texts:
+            hit = self.memory.get((_hash(text), target_lang))
+            if hit is not None:
+                found[text] = hit
+            else:
+                missing[_hash(text)] = text
+
+        if missing:
+            try:
+                rows = await asyncio.to_thread(self._load, list(missing), target_lang)
+            except Exception as e:
+                print(f"⚠️ Translation memory read failed: {e}")
+                rows = {}
+
+            self.db_hits += len(rows)
+            self.db_misses += len(missing) - len(rows)
+            for h, translated in rows.items():
+                self.memory.set((h, target_lang), translated)
+                found[missing[h]] = translated
+
+        return found
+
+    async def store(self, pairs: list[tuple[str, str]], target_lang: str):
+        if not pairs:
+            return
+        for source, translated in pairs:
+            self.memory.set((_hash(source), target_lang), translated)
+        try:
+            await asyncio.to_thread(self._save, pairs, target_lang)
+        except Exception as e:
+            print(f"⚠️ Translation memory write failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "db": {"hits": self.db_hits, "misses": self.db_misses},
+        }
+
+
+translation_memory = TranslationMemory(TRANSLATION_CACHE_SIZE)
+
+
+# ==============================================
+# 🌐 DeepL Translation (Async + Batch)
+# ==============================================
+DEEPL_URL = "https://api-free.deepl.com/v2/translate"
+
+# DeepL accepts up to 50 `text` params and 128 KiB per request; stay a little under
+DEEPL_MAX_TEXTS_PER_REQUEST = int(os.getenv("DEEPL_MAX_TEXTS_PER_REQUEST", "50"))
+DEEPL_MAX_REQUEST_BYTES = int(os.getenv("DEEPL_MAX_REQUEST_BYTES", str(120 * 1024)))
+DEEPL_MAX_CONCURRENCY = int(os.getenv("DEEPL_MAX_CONCURRENCY", "4"))
+
+_deepl_semaphore = asyncio.Semaphore(DEEPL_MAX_CONCURRENCY)
+
+
+class BatchStats:
+    """Per-request latency of DeepL batch calls."""
+
+    def __init__(self):
+        self.batches = 0
+        self.texts = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, size: int, elapsed_ms: float, ok: bool):
+        self.batches += 1
+        self.texts += size
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+        if not ok:
+            self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "failures": self.failures,
+            "avg_ms": round(self.total_ms / self.batches, 1) if self.batches else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "last_ms": round(self.last_ms, 1),
+        }
+
+
+batch_stats = BatchStats()
+
+
+def chunk_texts(texts: list[str], max_texts: int = DEEPL_MAX_TEXTS_PER_REQUEST,
+                max_bytes: int = DEEPL_MAX_REQUEST_BYTES) -> list[list[int]]:
+    """Split texts into request-sized groups of indices, respecting count and payload limits."""
+    chunks: list[list[int]] = []
+    current: list[int] = []
+    current_bytes = 0
+
+    for i, text in enumerate(texts):
+        size = len(text.encode("utf-8"))
+        if current and (len(current) >= max_texts or current_bytes + size > max_bytes):
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append(i)
+        current_bytes += size
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _deepl_request(client: httpx.AsyncClient, texts: list[str], target_lang: str) -> list[str] | None:
+    """One DeepL call with several `text` params. Returns translations in input order, or None on failure."""
+    started = time.perf_counter()
+    ok = False
+    try:
+        async with _deepl_semaphore:
+            params = {
+                "auth_key": DEEPL_API_KEY,
+                "text": texts,
+                "target_lang": target_lang
+            }
+            response = await deepl.request(client, "POST", DEEPL_URL, data=params)
+            data = response.json()
+
+        translations = data.get("translations") if isinstance(data, dict) else None
+        if translations and len(translations) == len(texts):
+            ok = True
+            return [t["text"] for t in translations]
+        print(f"⚠️ DeepL returned {len(translations or [])} translations for {len(texts)} texts")
+    except Exception as e:
+        print(f"⚠️ DeepL Async Error: {e}")
+    finally:
+        batch_stats.record(len(texts), (time.perf_counter() - started) * 1000, ok)
+    return None
+
+
+async def _deepl_translate_many(client: httpx.AsyncClient, texts: list[str], target_lang: str) -> list[str | None]:
+    """Translate texts with concurrent, size-limited DeepL requests. Positions map 1:1 to the input."""
+    chunks = chunk_texts(texts)
+    results = await asyncio.gather(*[
+        _deepl_request(client, [texts[i] for i in chunk], target_lang)
+        for chunk in chunks
+    ])
+
+    out: list[str | None] = [None] * len(texts)
+    for chunk, translated in zip(chunks, results):
+        if translated is None:
+            continue
+        for i, t in zip(chunk, translated):
+            out[i] = t
+    return out
+
+
+async def translate_async(client: httpx.AsyncClient, text: str, target_lang: str = "JA") -> str:
+    """Non-blocking translation of a single string."""
+    if not text:
+        return ""
+    return (await translate_batch(client, [text], target_lang))[0]
+
+
+async def translate_batch(client: httpx.AsyncClient, texts: list[str], target_lang: str = "JA") -> list[str]:
+    """
+    Translate multiple strings, sending only translation-memory misses to DeepL.
+    The result is index-aligned with `texts`: empty strings stay empty and
+    anything DeepL fails to translate is returned untranslated.
+    """
+    return (await translate_batch_checked(client, texts, target_lang))[0]
+
+
+async def translate_batch_checked(client: httpx.AsyncClient, texts: list[str],
+                                  target_lang: str = "JA") -> tuple[list[str], bool]:
+    """
+    Like translate_batch, plus whether every text was actually translated.
+    Callers that cache the result should skip caching when it is False.
+    """
+    if not texts: return [], True
+
+    valid_texts = [t for t in texts if t]
+    if not valid_texts: return ["" for _ in texts], True
+
+    # 1️⃣ Translation memory
+    found = await translation_memory.lookup(valid_texts, target_lang)
+
+    # 2️⃣ DeepL for the (deduplicated) misses. Texts another request is already
+    # translating are awaited instead of being sent again.
+    misses = list(dict.fromkeys(t for t in valid_texts if t not in found))
+    leading, waiting = [], {}
+    for text in misses:
+        future, is_leader = translation_flight.join((_hash(text), target_lang))
+        if is_leader:
+            leading.append(text)
+        else:
+            waiting[text] = future
+
+    if leading:
+        translated = [None] * len(leading)
+        try:
+            translated = await _deepl_translate_many(client, leading, target_lang)
+            pairs = [(src, t) for src, t in zip(leading, translated) if t is not None]
+            await translation_memory.store(pairs, target_lang)
+            found.update(pairs)
+        finally:
+            for src, t in zip(leading, translated):
+                translation_flight.finish((_hash(src), target_lang), t)
+
+    if waiting:
+        shared = await asyncio.gather(*[asyncio.shield(f) for f in waiting.values()])
+        found.update((src, t) for src, t in zip(waiting, shared) if t is not None)
+
+    # 3️⃣ No Fallback: Return original if DeepL fails
+    complete = all(t in found for t in valid_texts)
+    return [found.get(t, t) if t else "" for t in texts], complete
@@ -0,0 +1,215 @@
+import asyncio
+import math
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import case, delete, exists, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+
+# Recency worth one doubling of likes in the trending score
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "72"))
+# How often the periodic job re-aggregates likes (0 disables it)
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", "3600"))
+# Dish names per statement in a targeted rebuild
+TRENDING_REBUILD_CHUNK = 500
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# =====================
+# Score
+# =====================
+# score = log2(likes) + hours(last_like - TRENDING_EPOCH) / TRENDING_HALF_LIFE_HOURS
+#
+# Doubling a dish's likes is worth one half-life of recency. The score does
+# not depend on "now", so ordering by the stored column is exact at any time
+# and never has to be re-decayed. (Migration 005 converts older decayed scores.)
+TRENDING_EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def time_term(at: datetime) -> float:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return (at - TRENDING_EPOCH).total_seconds() / 3600 / TRENDING_HALF_LIFE_HOURS
+
+
+def hot_score(likes: int, last_like_at: datetime) -> float:
+    return math.log2(max(likes, 1)) + time_term(last_like_at)
+
+
+def _log_likes(likes):
+    # SQL log2(max(likes, 1)); CASE instead of GREATEST so SQLite runs it too
+    return func.log2(case((likes > 1, likes), else_=1))
+
+
+def _create(db: Session, dish_name: str, post_id: int | None, image: str | None):
+    """Insert the dish's trend row; a concurrent insert of the same dish is fine."""
+    now = _now()
+    try:
+        with db.begin_nested():
+            db.add(models.DishTrend(
+                dish_name=dish_name,
+                likes=0,
+                score=hot_score(0, now),
+                score_updated_at=now,
+                post_id=post_id,
+                image=image,
+            ))
+    except IntegrityError:
+        pass
+
+
+# =====================
+# Incremental updates (called inside the caller's transaction)
+# =====================
+# Single atomic UPDATEs: the row lock is held only from the statement to the
+# caller's commit, never across a read-modify-write round trip.
+
+def record_post(db: Session, post: models.CommunityPost):
+    """Make sure a newly created post's dish has a trend row."""
+    trend = models.DishTrend
+    updated = db.execute(
+        update(trend)
+        .where(trend.dish_name == post.dish_name)
+        .values(image=func.coalesce(func.nullif(trend.image, ""), post.dish_image))
+    ).rowcount
+    if not updated:
+        _create(db, post.dish_name, post.id, post.dish_image)
+
+
+def record_like(db: Session, post: models.CommunityPost, delta: int):
+    """Apply a like (+1) or unlike (-1) on `post` to its dish aggregate."""
+    trend = models.DishTrend
+    likes = case((trend.likes + delta < 0, 0), else_=trend.likes + delta)
+
+    if delta > 0:
+        now = _now()
+        values = [
+            (trend.score, _log_likes(likes) + time_term(now)),
+            (trend.likes, likes),
+            (trend.score_updated_at, now),
+        ]
+    else:
+        # Keep the recency term, only swap the log-likes part
+        values = [
+            (trend.score, trend.score - _log_likes(trend.likes) + _log_likes(likes)),
+            (trend.likes, likes),
+        ]
+
+    # score comes first: MySQL evaluates SET left to right with already-updated values
+    stmt = update(trend).where(trend.dish_name == post.dish_name).ordered_values(*values)
+    if not db.execute(stmt).rowcount:
+        _create(db, post.dish_name, post.id, post.dish_image)
+        db.execute(stmt)
+
+
+# =====================
+# Reads
+# =====================
+
+def top_dishes(db: Session, k: int = 5, sort: str = "likes") -> list[models.DishTrend]:
+    order = models.DishTrend.score if sort == "score" else models.DishTrend.likes
+    return (
+        db.query(models.DishTrend)
+        .order_by(order.desc(), models.DishTrend.post_id.asc())
+        .limit(k)
+        .all()
+    )
+
+
+# =====================
+# Periodic job
+# =====================
+
+def _rebuild(db: Session, dish_names: list[str] | None = None) -> int:
+    trend, post, like = models.DishTrend, models.CommunityPost, models.PostLike
+
+    posts = db.query(post.dish_name).distinct()
+    trends = db.query(trend.dish_name)
+    if dish_names is not None:
+        posts = posts.filter(post.dish_name.in_(dish_names))
+        trends = trends.filter(trend.dish_name.in_(dish_names))
+    dishes = {name for (name,) in posts}
+
+    # Dishes that have posts but no trend row yet (post_id / image are filled in below)
+    for dish_name in dishes - {name for (name,) in trends}:
+        _create(db, dish_name, None, None)
+
+    # One set-based UPDATE: each row is recounted under its own row lock, so
+    # record_like increments that commit meanwhile are not overwritten
+    actual_likes = (
+        select(func.count(like.id))
+        .join(post, post.id == like.post_id)
+        .where(post.dish_name == trend.dish_name)
+        .scalar_subquery()
+    )
+    first_post_id = select(func.min(post.id)).where(post.dish_name == trend.dish_name).scalar_subquery()
+    first_image = (
+        select(post.dish_image)
+        .where(post.dish_name == trend.dish_name)
+        .order_by(post.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    stmt = update(trend).ordered_values(
+        (trend.score, trend.score - _log_likes(trend.likes) + _log_likes(actual_likes)),
+        (trend.likes, actual_likes),
+        (trend.post_id, first_post_id),
+        (trend.image, first_image),
+    )
+    gone = delete(trend).where(~exists().where(post.dish_name == trend.dish_name))
+    if dish_names is not None:
+        stmt = stmt.where(trend.dish_name.in_(dish_names))
+        gone = gone.where(trend.dish_name.in_(dish_names))
+
+    db.execute(stmt)
+    # Dishes whose posts are all gone
+    db.execute(gone)
+    db.commit()
+    return len(dishes)
+
+
+def rebuild(db: Session) -> int:
+    """
+    Recompute like totals per dish from post_likes.
+    Repairs any drift in the incremental counters; returns the number of dishes.
+    """
+    return _rebuild(db)
+
+
+def rebuild_dishes(db: Session, dish_names) -> int:
+    """Same as rebuild(), limited to the given dishes (e.g. the ones an account deletion touched)."""
+    dish_names = sorted(set(dish_names))
+    count = 0
+    for start in range(0, len(dish_names), TRENDING_REBUILD_CHUNK):
+        count += _rebuild(db, dish_names[start:start + TRENDING_REBUILD_CHUNK])
+    return count
+
+
+def _rebuild_job() -> int:
+    db = SessionLocal()
+    try:
+        return rebuild(db)
+    finally:
+        db.close()
+
+
+async def refresh_loop():
+    """Rebuild at startup, then every TRENDING_REFRESH_SECONDS."""
+    while True:
+        try:
+            count = await asyncio.to_thread(_rebuild_job)
+            print(f"📈 Trending rebuilt ({count} dishes)")
+        except Exception as e:
+            print(f"⚠️ Trending rebuild failed: {e}")
+        await asyncio.sleep(TRENDING_REFRESH_SECONDS)
+
+
+if __name__ == "__main__":
+    print(f"✅ Rebuilt {_rebuild_job()} dish trends")
@@ -0,0 +1,97 @@
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+async def save_upload(file: UploadFile, dest: str | Path, max_bytes: int = MAX_UPLOAD_BYTES) -> int:
+    """
+    Stream an upload to `dest` in fixed-size chunks, so memory stays bounded
+    by UPLOAD_CHUNK_SIZE regardless of the file size.
+    Aborts with 413 as soon as the limit is crossed; no partial file is left behind.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    dest = Path(dest)
+    tmp = dest.with_name(dest.name + ".part")
+    written = 0
+    try:
+        with tmp.open("wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise _too_large(max_bytes)
+                out.write(chunk)
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return written
+
+
+async def save_upload_temp(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """Stream an upload into a temp file and return its path. The caller deletes it."""
+    suffix = Path(file.filename or "").suffix
+    fd, path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+    os.close(fd)
+    try:
+        await save_upload(file, path, max_bytes)
+    except BaseException:
+        Path(path).unlink(missing_ok=True)
+        raise
+    return path
+
+
+class MaxUploadSizeMiddleware:
+    """
+    Caps the body size of multipart requests.
+    A declared Content-Length over the limit is rejected before the body is read;
+    otherwise (including chunked uploads) bytes are counted as they arrive and
+    the request fails with 413 once the limit is crossed, before the rest is spooled.
+    """
+
+    def __init__(self, app, max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        # Allow some room for multipart boundaries and form fields
+        self.max_bytes = max_bytes + 64 * 1024
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse({"detail": "Request body too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside the form parser; the app's exception handler answers 413
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,70 @@
+"""
+Static file responses with long-lived HTTP caching.
+
+Upload and variant file names never change content (UUID / per-upload names),
+so they are served with `Cache-Control: immutable` and a strong ETag built
+from size + mtime. Conditional requests get a 304, and Range requests are
+answered by FileResponse with 206 partial content.
+"""
+import os
+from email.utils import parsedate
+
+from fastapi import Request
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+IMMUTABLE_CACHE_CONTROL = os.getenv("STATIC_CACHE_CONTROL", "public, max-age=31536000, immutable")
+
+
+def strong_etag(stat_result: os.stat_result) -> str:
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def cache_headers(stat_result: os.stat_result) -> dict[str, str]:
+    return {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "ETag": strong_etag(stat_result),
+    }
+
+
+def is_not_modified(response_headers: Headers, request_headers: Headers) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return response_headers["etag"] in tags
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers.get("last-modified", ""))
+    return bool(if_modified_since and last_modified and if_modified_since >= last_modified)
+
+
+def cached_file_response(
+    request: Request, path: str | os.PathLike, media_type: str | None = None, immutable: bool = True
+):
+    """
+    FileResponse with immutable caching headers, or 304 when the client copy is current.
+    `immutable=False` makes the client revalidate, for stand-in content served under another URL.
+    """
+    stat_result = os.stat(path)
+    headers = cache_headers(stat_result)
+    if not immutable:
+        headers["Cache-Control"] = "no-cache"
+    response = FileResponse(path, media_type=media_type, stat_result=stat_result, headers=headers)
+    if is_not_modified(response.headers, request.headers):
+        return NotModifiedResponse(response.headers)
+    return response
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles mount with the same caching headers as cached_file_response."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, headers=cache_headers(stat_result)
+        )
+        if is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base, SessionLocal
+from backend.services import account_deletion, trending
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _user(db, name):
+    user = models.Users(name=name, email=f"{name}@example.com")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _post(db, user, dish):
+    post = models.CommunityPost(user_id=user.id, dish_name=dish, dish_image="x.jpg")
+    db.add(post)
+    db.flush()
+    return post
+
+
+def test_deletion_repairs_only_the_touched_dishes(db):
+    alice, bob = _user(db, "alice"), _user(db, "bob")
+    ramen = _post(db, alice, "ramen")
+    _post(db, alice, "sushi")
+    curry = _post(db, bob, "curry")
+    db.add_all([
+        models.PostLike(post_id=ramen.id, user_id=bob.id),
+        models.PostLike(post_id=curry.id, user_id=alice.id),
+    ])
+    db.commit()
+    trending.rebuild(db)
+
+    # Drift on a dish alice never touched must be left to the periodic rebuild
+    db.add(models.DishTrend(dish_name="udon", likes=7, score=7.0, post_id=None))
+    db.commit()
+
+    account_deletion.delete_account_now(db, alice)
+
+    trends = {t.dish_name: t.likes for t in db.query(models.DishTrend)}
+    assert trends == {"curry": 0, "udon": 7}
+
+
+def test_active_job_is_reused(db):
+    user = _user(db, "carol")
+    db.commit()
+    assert account_deletion.active_job(db, user.id) is None
+
+    job = account_deletion.start_job(db, user.id, total_rows=10_000)
+    assert account_deletion.active_job(db, user.id).id == job.id
+
+    job.status = "failed"
+    db.commit()
+    assert account_deletion.active_job(db, user.id) is None
+
+
+def test_stale_job_is_detected_and_resumed(db):
+    user = _user(db, "dave")
+    _post(db, user, "ramen")
+    db.commit()
+    user_id = user.id
+    job = account_deletion.start_job(db, user_id, total_rows=1)
+    assert not account_deletion.is_stale(job)
+
+    # Worker died mid-run: still "running", no heartbeat since
+    job.status = "running"
+    job.updated_at = datetime.now(timezone.utc) - timedelta(seconds=account_deletion.ACCOUNT_DELETE_STALE_SECONDS + 1)
+    db.commit()
+    assert account_deletion.active_job(db, user_id).id == job.id
+    assert account_deletion.is_stale(job)
+
+    account_deletion.resume_job(db, job)
+    assert job.status == "pending" and not account_deletion.is_stale(job)
+
+    account_deletion.run_job.__globals__["SessionLocal"] = sessionmaker(bind=db.get_bind())
+    try:
+        account_deletion.run_job(job.id)
+    finally:
+        account_deletion.run_job.__globals__["SessionLocal"] = SessionLocal
+
+    db.expire_all()
+    assert db.get(models.AccountDeletionJob, job.id).status == "done"
+    assert db.query(models.CommunityPost).filter_by(user_id=user_id).count() == 0
+    assert account_deletion.active_job(db, user_id) is None
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from backend.services.batching import MicroBatcher
+
+
+def test_failures_are_not_counted_as_completed():
+    async def batch_fn(items):
+        if "boom" in items:
+            raise RuntimeError("model crashed")
+        return [ValueError("bad image") if item == "bad" else item.upper() for item in items]
+
+    async def run():
+        batcher = MicroBatcher(batch_fn, max_batch=2, max_wait_ms=50, max_queue=10)
+        try:
+            assert await asyncio.gather(batcher.submit("a"), batcher.submit("b")) == ["A", "B"]
+            with pytest.raises(ValueError):
+                await asyncio.gather(batcher.submit("c"), batcher.submit("bad"))
+            with pytest.raises(RuntimeError):
+                await asyncio.gather(batcher.submit("boom"), batcher.submit("d"))
+            await asyncio.sleep(0)
+            return batcher.stats()
+        finally:
+            await batcher.stop()
+
+    stats = asyncio.run(run())
+
+    assert (stats["batches"], stats["items"]) == (2, 3)
+    assert (stats["failed_batches"], stats["failed_items"]) == (1, 3)
+    assert stats["avg_batch_size"] == 2.0
@@ -0,0 +1,53 @@
+import asyncio
+import json
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from backend.services.classifier import OnnxClassifier
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """Tiny model: per-channel mean of the input as 3 logits, with a shortest_edge-only preprocessor."""
+    from onnx import TensorProto, helper
+
+    graph = helper.make_graph(
+        [helper.make_node("ReduceMean", ["pixel_values"], ["logits"], axes=[2, 3], keepdims=0)],
+        "channel_mean",
+        [helper.make_tensor_value_info("pixel_values", TensorProto.FLOAT, ["batch", 3, "height", "width"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", 3])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, tmp_path / "model.onnx")
+
+    (tmp_path / "config.json").write_text(json.dumps({"id2label": {"0": "red", "1": "green", "2": "blue"}}))
+    (tmp_path / "preprocessor_config.json").write_text(json.dumps({
+        "size": {"shortest_edge": 32},
+        "do_center_crop": False,
+        "image_mean": [0.0, 0.0, 0.0],
+        "image_std": [1.0, 1.0, 1.0],
+    }))
+    return tmp_path
+
+
+def _jpeg(size, color) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", size, color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def test_batch_of_mixed_aspect_ratios_stacks(model_dir):
+    classifier = OnnxClassifier(str(model_dir))
+    images = [_jpeg((640, 480), "red"), _jpeg((300, 900), "blue")]
+
+    results = asyncio.run(classifier.classify_batch(images))
+
+    assert [r[0]["label"] for r in results] == ["red", "blue"]
+    assert classifier._to_array(images[0]).shape == classifier._to_array(images[1]).shape == (3, 32, 32)
@@ -0,0 +1,55 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services import translation
+from backend.services.resilience import UpstreamUnavailable
+from backend.services.spoonacular_service import search_recipe_id
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def no_translation_memory(monkeypatch):
+    async def lookup(texts, target_lang):
+        return {}
+
+    async def store(pairs, target_lang):
+        pass
+
+    monkeypatch.setattr(translation.translation_memory, "lookup", lookup)
+    monkeypatch.setattr(translation.translation_memory, "store", store)
+
+
+def test_search_quota_error_is_not_read_as_no_results():
+    async def run():
+        async with _client(lambda request: httpx.Response(402, json={"message": "quota"})) as client:
+            with pytest.raises(UpstreamUnavailable):
+                await search_recipe_id(client, "ramen")
+
+    asyncio.run(run())
+
+
+def test_failed_translation_is_reported(no_translation_memory):
+    async def run():
+        async with _client(lambda request: httpx.Response(456, json={"message": "quota"})) as client:
+            return await translation.translate_batch_checked(client, ["ramen", ""])
+
+    texts, complete = asyncio.run(run())
+
+    assert texts == ["ramen", ""]
+    assert not complete
+
+
+def test_successful_translation_is_complete(no_translation_memory):
+    def handler(request):
+        return httpx.Response(200, json={"translations": [{"text": "ラーメン"}]})
+
+    async def run():
+        async with _client(handler) as client:
+            return await translation.translate_batch_checked(client, ["ramen", ""])
+
+    assert asyncio.run(run()) == (["ラーメン", ""], True)
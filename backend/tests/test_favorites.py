@@ -0,0 +1,27 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.services.favorites import clean_foods, get_favorites, save_favorites
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_clean_foods_dedupes_ignoring_case_and_keeps_first_spelling():
+    foods = [" Ramen ", "sushi", "ramen", "RAMEN", "", "  ", "Sushi", "Green  Curry", "green curry"]
+    assert clean_foods(foods) == ["Ramen", "sushi", "Green  Curry"]
+
+
+def test_saving_a_new_spelling_replaces_the_old_one(db):
+    save_favorites(db, 1, ["sushi", "ramen"])
+    save_favorites(db, 1, ["Ramen", "Sushi"])
+    assert get_favorites(db, 1) == ["Ramen", "Sushi"]
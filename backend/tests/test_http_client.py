@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services.http_client import HTTPClientPool, _CountingTransport
+
+
+def _client(pool: HTTPClientPool, handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=_CountingTransport(httpx.MockTransport(handler), pool))
+
+
+def test_in_flight_returns_to_zero_after_errors():
+    pool = HTTPClientPool()
+
+    def handler(request):
+        if request.url.path == "/fail":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, text="ok")
+
+    async def run():
+        async with _client(pool, handler) as client:
+            await client.get("https://api.example.com/ok")
+            with pytest.raises(httpx.ConnectError):
+                await client.get("https://api.example.com/fail")
+
+    asyncio.run(run())
+
+    stats = pool.stats()
+    assert stats["requests_by_host"] == {"api.example.com": 2}
+    assert stats["in_flight_by_host"] == {"api.example.com": 0}
+
+
+class _Body(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        yield b"body"
+
+
+def test_streamed_response_is_in_flight_until_closed():
+    pool = HTTPClientPool()
+
+    async def run():
+        async with _client(pool, lambda request: httpx.Response(200, stream=_Body())) as client:
+            async with client.stream("GET", "https://api.example.com/") as response:
+                assert pool.stats()["in_flight_by_host"] == {"api.example.com": 1}
+                await response.aread()
+            assert pool.stats()["in_flight_by_host"] == {"api.example.com": 0}
+
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from backend.services import image_variants
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_variants, "UPLOAD_ROOT", tmp_path / "uploads")
+    monkeypatch.setattr(image_variants, "IMAGE_VARIANT_DIR", tmp_path / "variants")
+    (tmp_path / "uploads" / "posts").mkdir(parents=True)
+    Image.new("RGB", (1200, 800), "orange").save(tmp_path / "uploads" / "posts" / "a.jpg")
+    return "posts/a.jpg"
+
+
+def test_variant_is_rendered_on_its_own_pipeline(upload):
+    path, is_variant = asyncio.run(image_variants.variant_or_original(upload, "thumb"))
+    image_variants.variant_pipeline.shutdown()
+
+    assert is_variant
+    assert max(Image.open(path).size) == image_variants.VARIANT_SIZES["thumb"]
+
+
+def test_saturated_variant_queue_serves_the_original(upload, monkeypatch):
+    monkeypatch.setattr(image_variants.variant_pipeline, "max_pending", 0)
+
+    path, is_variant = asyncio.run(image_variants.variant_or_original(upload, "thumb"))
+
+    assert not is_variant
+    assert path == image_variants.source_path(upload)
+    assert not image_variants.variant_path(upload, "thumb", "webp").exists()
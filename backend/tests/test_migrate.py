@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend import migrate
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def test_fresh_database_gets_the_full_schema(engine):
+    migrate.run(engine)
+    migrate.check_schema(engine)
+    assert [applied for _, _, applied in migrate.status(engine)] == [True] * len(migrate.migration_files())
+
+
+def test_missing_mapped_columns_fail_fast(engine):
+    migrate.run(engine)
+    with engine.begin() as conn:
+        # community_posts as it was before 002_community_posts_counters.sql
+        conn.execute(text("DROP TABLE community_posts"))
+        conn.execute(text(
+            "CREATE TABLE community_posts (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL,"
+            " dish_name VARCHAR(255) NOT NULL, dish_image TEXT NOT NULL, opinion TEXT, created_at DATETIME)"
+        ))
+
+    with pytest.raises(migrate.SchemaOutOfDate, match="community_posts.like_count, community_posts.comment_count"):
+        migrate.check_schema(engine)
+
+
+def test_half_applied_migration_can_be_rerun(engine):
+    migrate.run(engine)
+    with engine.begin() as conn:
+        # 002 died after its first ALTER: like_count exists, comment_count does not, nothing recorded
+        conn.execute(text("ALTER TABLE community_posts DROP COLUMN comment_count"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = '002'"))
+
+    assert migrate.run(engine) == ["002"]
+    migrate.check_schema(engine)
+
+
+def test_existing_indexes_and_columns_are_skipped(engine):
+    migrate.run(engine)
+    with engine.connect() as conn:
+        assert migrate._already_applied(conn, "CREATE UNIQUE INDEX ux_post_likes_post_user ON post_likes (post_id, user_id)")
+        assert migrate._already_applied(conn, "ALTER TABLE community_posts ADD COLUMN like_count INT NOT NULL DEFAULT 0")
+        assert not migrate._already_applied(conn, "CREATE INDEX ix_post_likes_new ON post_likes (created_at)")
+        assert not migrate._already_applied(conn, "UPDATE community_posts SET like_count = 0")
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base
+from backend.pagination import DEFAULT_PAGE_SIZE, keyset_page, next_cursor, page_size
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = models.Users(name="alice", email="alice@example.com")
+    session.add(user)
+    session.flush()
+    start = datetime(2026, 1, 1)
+    session.add_all([
+        models.CommunityPost(user_id=user.id, dish_name=f"dish {i}", dish_image="x.jpg",
+                             created_at=start + timedelta(minutes=i))
+        for i in range(DEFAULT_PAGE_SIZE + 10)
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _page(db, cursor, limit):
+    limit = page_size(cursor, limit)
+    rows = keyset_page(db.query(models.CommunityPost), models.CommunityPost.created_at,
+                       models.CommunityPost.id, cursor, limit)
+    return rows, next_cursor(rows, limit, lambda post: (post.created_at, post.id))
+
+
+def test_no_limit_or_cursor_returns_every_post(db):
+    rows, cursor = _page(db, None, None)
+    assert len(rows) == DEFAULT_PAGE_SIZE + 10
+    assert cursor is None
+
+
+def test_paging_is_opt_in_and_covers_every_post(db):
+    first, cursor = _page(db, None, 25)
+    assert len(first) == 25 and cursor
+
+    seen = list(first)
+    while cursor:
+        rows, cursor = _page(db, cursor, None)  # follow-up pages default to DEFAULT_PAGE_SIZE
+        seen.extend(rows)
+
+    assert [p.id for p in seen] == [p.id for p in _page(db, None, None)[0]]
@@ -0,0 +1,35 @@
+from PIL import Image, ImageDraw
+
+from backend.services.image_pipeline import preprocess_for_prediction
+from backend.services.prediction_cache import image_dhash, image_fingerprint
+
+
+def _dish(color, background="white") -> Image.Image:
+    image = Image.new("RGB", (640, 480), background)
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((120, 80, 520, 400), fill=color)
+    draw.rectangle((280, 200, 360, 280), fill="black")
+    return image
+
+
+def test_flat_images_are_not_cacheable():
+    for color in ["red", "green", "black", "white"]:
+        assert image_dhash(Image.new("RGB", (64, 64), color)) == "0" * 16
+        assert image_fingerprint(Image.new("RGB", (64, 64), color)) is None
+
+    gradient = Image.linear_gradient("L").convert("RGB")
+    assert image_fingerprint(gradient) is None
+
+
+def test_same_shape_in_different_colours_gets_different_keys():
+    red, green = image_fingerprint(_dish("red")), image_fingerprint(_dish("green"))
+    assert red is not None and green is not None
+    assert red != green
+
+
+def test_same_photo_uploaded_again_hits_the_same_key(tmp_path):
+    _dish("orange").save(tmp_path / "a.jpg", quality=90)
+
+    _, first = preprocess_for_prediction(str(tmp_path / "a.jpg"))
+    _, second = preprocess_for_prediction(str(tmp_path / "a.jpg"))
+    assert first is not None and first == second
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.services.resilience import CircuitBreaker, Upstream, UpstreamUnavailable
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _open_circuit(upstream: Upstream):
+    for _ in range(upstream.breaker.failure_threshold):
+        upstream.breaker.record_failure()
+    assert upstream.breaker.state == CircuitBreaker.OPEN
+    upstream.breaker.opened_at -= upstream.breaker.reset_seconds
+
+
+def test_cancelled_probe_does_not_wedge_half_open_circuit():
+    async def run():
+        upstream = Upstream("test", timeout=5, max_retries=0)
+        _open_circuit(upstream)
+
+        started = asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200)
+
+        async with _client(slow) as client:
+            probe = asyncio.create_task(upstream.request(client, "GET", "https://example.test/"))
+            await started.wait()
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+
+        async with _client(lambda request: httpx.Response(200)) as client:
+            response = await upstream.request(client, "GET", "https://example.test/")
+
+        assert response.status_code == 200
+        assert upstream.breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(run())
+
+
+def test_unexpected_error_in_probe_releases_it():
+    async def run():
+        upstream = Upstream("test", timeout=5, max_retries=0)
+        _open_circuit(upstream)
+
+        def broken(request):
+            raise ValueError("unexpected")
+
+        async with _client(broken) as client:
+            with pytest.raises(ValueError):
+                await upstream.request(client, "GET", "https://example.test/")
+
+        async with _client(lambda request: httpx.Response(200)) as client:
+            response = await upstream.request(client, "GET", "https://example.test/")
+
+        assert response.status_code == 200
+
+    asyncio.run(run())
+
+
+def test_open_circuit_short_circuits_and_failed_probe_reopens():
+    async def run():
+        upstream = Upstream("test", timeout=5, max_retries=0)
+        _open_circuit(upstream)
+        upstream.breaker.opened_at += upstream.breaker.reset_seconds
+
+        async with _client(lambda request: httpx.Response(200)) as client:
+            with pytest.raises(UpstreamUnavailable):
+                await upstream.request(client, "GET", "https://example.test/")
+
+        upstream.breaker.opened_at -= upstream.breaker.reset_seconds
+        async with _client(lambda request: httpx.Response(503)) as client:
+            with pytest.raises(UpstreamUnavailable):
+                await upstream.request(client, "GET", "https://example.test/")
+
+        assert upstream.breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(run())
+
+
+def test_hedges_are_off_by_default_and_spend_retry_budget():
+    calls = []
+
+    async def slow(request):
+        calls.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    async def run(upstream):
+        async with _client(slow) as client:
+            await upstream.request(client, "GET", "https://api.example.com/", hedge=True)
+
+    asyncio.run(run(Upstream("default", timeout=5)))
+    assert len(calls) == 1
+
+    calls.clear()
+    hedged = Upstream("hedged", timeout=5, hedge_after_ms=1)
+    tokens = hedged.budget.tokens
+    asyncio.run(run(hedged))
+    assert len(calls) == 2 and hedged.hedges == 1
+    assert hedged.budget.tokens == pytest.approx(min(hedged.budget.burst, tokens + hedged.budget.ratio) - 1)
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base
+from backend.services import translation
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(translation, "SessionLocal", sessionmaker(bind=engine))
+    yield translation.TranslationMemory(maxsize=10), engine
+    engine.dispose()
+
+
+def test_batch_is_saved_in_one_statement_and_overwrites(memory):
+    tm, engine = memory
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    tm._save([("ramen", "ラーメン"), ("sushi", "すし"), ("ramen", "ラーメン")], "JA")
+    assert sum(s.startswith("INSERT") for s in statements) == 1
+
+    tm._save([("sushi", "寿司"), ("curry", "カレー")], "JA")
+    hashes = [translation._hash(t) for t in ("ramen", "sushi", "curry")]
+    assert tm._load(hashes, "JA") == dict(zip(hashes, ["ラーメン", "寿司", "カレー"]))
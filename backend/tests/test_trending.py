@@ -0,0 +1,94 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import models
+from backend.database import Base
+from backend.services import trending
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _post(db, dish, user_id=1):
+    post = models.CommunityPost(user_id=user_id, dish_name=dish, dish_image=f"{dish}.jpg")
+    db.add(post)
+    db.flush()
+    trending.record_post(db, post)
+    db.commit()
+    return post
+
+
+def _like(db, post, user_id):
+    db.add(models.PostLike(post_id=post.id, user_id=user_id))
+    trending.record_like(db, post, +1)
+    db.commit()
+
+
+def _trend(db, dish):
+    db.expire_all()
+    return db.get(models.DishTrend, dish)
+
+
+def test_score_is_log_likes_plus_recency_of_last_like(db):
+    ramen = _post(db, "ramen")
+    for user_id in range(2, 6):
+        _like(db, ramen, user_id)
+
+    trend = _trend(db, "ramen")
+    assert trend.likes == 4
+    score = trend.score
+    assert score == pytest.approx(trending.hot_score(4, trend.score_updated_at))
+
+    # An unlike keeps the recency term and only swaps log2(4) for log2(3)
+    trending.record_like(db, ramen, -1)
+    db.commit()
+    assert _trend(db, "ramen").score == pytest.approx(score - 2 + math.log2(3))
+
+
+def test_score_order_does_not_depend_on_when_it_is_read():
+    now = datetime(2026, 6, 1, tzinfo=timezone.utc)
+    older_popular = trending.hot_score(8, now - timedelta(hours=trending.TRENDING_HALF_LIFE_HOURS * 2))
+    newer = trending.hot_score(3, now)
+    # 8 likes two half-lives ago ≈ 2 likes now, so 3 fresh likes rank higher
+    assert newer > older_popular
+
+
+def test_rebuild_recounts_likes_and_keeps_recency(db):
+    ramen = _post(db, "ramen")
+    _like(db, ramen, 2)
+    _like(db, ramen, 3)
+    before = _trend(db, "ramen").score
+
+    # Drift: a like row the aggregate never saw, and a trend row without posts
+    db.add(models.PostLike(post_id=ramen.id, user_id=4))
+    db.add(models.DishTrend(dish_name="udon", likes=7, score=1.0))
+    db.commit()
+
+    trending.rebuild(db)
+
+    trend = _trend(db, "ramen")
+    assert (trend.likes, trend.post_id, trend.image) == (3, ramen.id, "ramen.jpg")
+    assert trend.score == pytest.approx(before - 1 + math.log2(3))
+    assert _trend(db, "udon") is None
+
+
+def test_rebuild_creates_missing_rows(db):
+    post = models.CommunityPost(user_id=1, dish_name="curry", dish_image="curry.jpg")
+    db.add(post)
+    db.commit()
+
+    trending.rebuild_dishes(db, ["curry"])
+
+    trend = _trend(db, "curry")
+    assert (trend.likes, trend.post_id, trend.image) == (0, post.id, "curry.jpg")
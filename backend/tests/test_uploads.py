@@ -0,0 +1,61 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from backend.services.uploads import MaxUploadSizeMiddleware, save_upload
+
+LIMIT = 256 * 1024
+
+
+def _app(tmp_path, calls=None):
+    app = FastAPI()
+    app.add_middleware(MaxUploadSizeMiddleware, max_bytes=LIMIT)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        if calls is not None:
+            calls.append(file.size)
+        return {"bytes": await save_upload(file, tmp_path / "out.bin", LIMIT)}
+
+    return app
+
+
+def _multipart(size: int) -> tuple[bytes, str]:
+    boundary = "testboundary"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + b"x" * size + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _chunked(body: bytes):
+    # A generator body is sent with Transfer-Encoding: chunked (no Content-Length)
+    for start in range(0, len(body), 16 * 1024):
+        yield body[start:start + 16 * 1024]
+
+
+def test_declared_content_length_over_limit_is_rejected(tmp_path):
+    body, content_type = _multipart(LIMIT * 2)
+    response = TestClient(_app(tmp_path)).post("/upload", content=body, headers={"content-type": content_type})
+    assert response.status_code == 413
+
+
+def test_chunked_upload_over_limit_is_rejected_while_streaming(tmp_path):
+    body, content_type = _multipart(LIMIT * 2)
+    calls = []
+    response = TestClient(_app(tmp_path, calls)).post(
+        "/upload", content=_chunked(body), headers={"content-type": content_type}
+    )
+    assert response.status_code == 413
+    # Rejected while the form was being parsed, before the endpoint ever ran
+    assert calls == []
+
+
+def test_chunked_upload_under_limit_is_saved(tmp_path):
+    body, content_type = _multipart(LIMIT // 2)
+    response = TestClient(_app(tmp_path)).post(
+        "/upload", content=_chunked(body), headers={"content-type": content_type}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"bytes": LIMIT // 2}